@@ -0,0 +1,59 @@
+"""Cash-flow measures over transaction rows.
+
+Every page that totals transactions goes through cash_measures(), so the
+type/source rules live in one place:
+
+- sales, returns: all rows of that type
+- expenses, vendor_payments, purchases: only rows paid from the till (source "sales")
+- withdrawals: all withdrawals
+- cash_out: expenses, vendor payments, purchases and withdrawals paid from the till,
+  i.e. what expected_cash subtracts from the opening cash
+
+Rows only need ``type``, ``source`` and ``amount`` keys, so raw transactions
+and daily_rollups rows can be mixed. The sums run on a columnar
+TransactionStore (transaction_store.py) of the rows.
+"""
+from transaction_store import TransactionStore
+
+CASH_OUT_TYPES = ["expense", "vendor_payment", "purchase", "withdrawal"]
+MEASURES = ["sales", "returns", "expenses", "vendor_payments", "purchases", "withdrawals", "cash_out"]
+
+
+def measure_masks(store):
+    """{measure: boolean mask of the store's rows it adds up}."""
+    from_till = store.is_source("sales")
+    return {
+        "sales": store.is_type("sale"),
+        "returns": store.is_type("return"),
+        "expenses": store.is_type("expense") & from_till,
+        "vendor_payments": store.is_type("vendor_payment") & from_till,
+        "purchases": store.is_type("purchase") & from_till,
+        "withdrawals": store.is_type("withdrawal"),
+        "cash_out": store.is_type(*CASH_OUT_TYPES) & from_till,
+    }
+
+
+def cash_measures(rows, by=None):
+    """Every cash-flow measure in one pass of masked sums.
+
+    rows is a list of rows or a TransactionStore. Without ``by`` returns
+    {measure: total}. With ``by`` (a column name such as "shift_id", "vendor_id"
+    or "date", or a list of them) returns {group_key: {measure: total}}; a
+    TransactionStore must have been built with its non-id ``by`` columns as keys.
+    """
+    store = rows if isinstance(rows, TransactionStore) else \
+        TransactionStore.from_rows(rows, [by] if isinstance(by, str) else by or ())
+    masks = measure_masks(store)
+    if by is None:
+        return {name: store.total(mask) for name, mask in masks.items()}
+    keys, sums = store.totals_by(by, masks)
+    return {key: {name: sums[name][i] for name in MEASURES} for i, key in enumerate(keys)}
+
+
+def empty_measures():
+    return {name: 0.0 for name in MEASURES}
+
+
+def expected_cash(opening_cash, measures):
+    """Cash the till should hold: opening cash plus sales, less returns and cash_out."""
+    return opening_cash + measures["sales"] - measures["returns"] - measures["cash_out"]
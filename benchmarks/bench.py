@@ -0,0 +1,222 @@
+"""Benchmark suite for the app's pages and reports.
+
+    python benchmarks/bench.py                   # compare with baseline.json
+    python benchmarks/bench.py --save-baseline   # record a new baseline
+    python benchmarks/bench.py --sizes 1m 1y --repeat 5
+    python benchmarks/bench.py --replica         # reports on the local read replica
+
+Each data size (1 month, 1 year, 5 years of seeded shifts; see
+seed_data.py) is loaded into the local backend, and one logged-in session
+times the Dashboard, the Recording page, the five report tabs over the whole
+seeded period and closing a shift. Every scenario records wall time
+(median of --repeat runs, each on a fresh copy of the data), query count,
+rows fetched, peak memory growth and, for reports, PDF generation time.
+With --replica the reports read the local read replica (replica.py), which
+is filled before the reports are timed; results are kept under
+"<size>-replica". The run fails (exit status 1) when a scenario is slower
+or uses more memory than the baseline beyond --threshold, issues more
+queries, or shows any error; errors are never recorded in a baseline, so
+--save-baseline refuses a run that has them.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+import harness
+
+BASELINE_PATH = os.path.join(harness.ROOT, "benchmarks", "baseline.json")
+REPORTS = [
+    # (scenario, start/end date inputs, button)
+    ("shift_report", "shift", "gen_shift"),
+    ("expense_report", "exp", "gen_exp"),
+    ("vendor_report", "ven", "gen_ven"),
+    ("personal_ledger", "per", "gen_per"),
+    ("profit_loss", "pl", "calc_pl"),
+]
+# Differences below these are noise, whatever the threshold
+MIN_SECONDS = 0.05
+MIN_MB = 16.0
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakMemory:
+    """Peak resident memory growth (MB) while the block runs, sampled every 5 ms."""
+
+    def __enter__(self):
+        self.start = self.peak = _rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, _rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_mb())
+        self.mb = self.peak - self.start
+
+
+class PDFTimer:
+    """Time spent building PDFs while active: exporting.ReportPDF's setup, table rows and output."""
+
+    def __init__(self):
+        from exporting import ReportPDF
+        self.seconds = 0.0
+        for name in ("__init__", "table_rows", "output"):
+            setattr(ReportPDF, name, self._timed(getattr(ReportPDF, name)))
+
+    def _timed(self, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+        return wrapper
+
+
+def measure(pdf_timer, action):
+    pdf_timer.seconds = 0.0
+    with PeakMemory() as memory:
+        seconds, queries, errors = action()
+    return {
+        "wall_s": seconds,
+        "queries": len(queries),
+        "rows": sum(q["rows"] for q in queries),
+        "peak_mb": memory.mb,
+        "pdf_s": pdf_timer.seconds,
+        "errors": errors,
+    }
+
+
+def run_once(size, dataset, pdf_timer):
+    harness.use_dataset(dataset)
+    session = harness.Session()
+    start, end = harness.date_range(size)
+    results = {"dashboard": measure(pdf_timer, lambda: session.open("Dashboard"))}
+    results["recording"] = measure(pdf_timer, lambda: session.open("Recording"))
+    services = sys.modules["services"]
+    if services.replica:
+        # The first, full pull happens once per replica; the reports then only pull changes
+        services.replica.sync(services.supabase)
+    session.open("Reports")
+    for scenario, prefix, button in REPORTS:
+        session.set("date_input", f"{prefix}_start", start)
+        session.set("date_input", f"{prefix}_end", end)
+        results[scenario] = measure(pdf_timer, lambda: session.click(button))
+    session.open("Recording")
+    session.set("number_input", "actual_Morning", 1000.0)
+    results["close_shift"] = measure(pdf_timer, lambda: session.click("close_Morning"))
+    return results
+
+
+def summarize(runs):
+    summary = {}
+    for scenario in runs[0]:
+        samples = [run[scenario] for run in runs]
+        summary[scenario] = {
+            "wall_s": round(statistics.median(s["wall_s"] for s in samples), 3),
+            "queries": max(s["queries"] for s in samples),
+            "rows": max(s["rows"] for s in samples),
+            "peak_mb": round(statistics.median(s["peak_mb"] for s in samples), 1),
+            "pdf_s": round(statistics.median(s["pdf_s"] for s in samples), 3),
+            "errors": sorted({str(e) for s in samples for e in s["errors"]}),
+        }
+    return summary
+
+
+def errors(results):
+    return [f"{size}/{scenario}: {error}" for size, scenarios in results.items()
+            for scenario, current in scenarios.items() for error in current["errors"]]
+
+
+def regressions(results, baseline, threshold):
+    found = errors(results)
+    for size, scenarios in results.items():
+        for scenario, current in scenarios.items():
+            base = baseline.get(size, {}).get(scenario)
+            if not base:
+                continue
+            for metric, floor in (("wall_s", MIN_SECONDS), ("pdf_s", MIN_SECONDS), ("peak_mb", MIN_MB)):
+                if current[metric] > base[metric] * (1 + threshold) and current[metric] - base[metric] > floor:
+                    found.append(f"{size}/{scenario}: {metric} {base[metric]} -> {current[metric]}")
+            if current["queries"] > base["queries"]:
+                found.append(f"{size}/{scenario}: queries {base['queries']} -> {current['queries']}")
+    return found
+
+
+def print_table(results, baseline):
+    print(f"{'size':<11}{'scenario':<17}{'wall s':>9}{'base s':>9}{'queries':>9}{'rows':>9}{'peak MB':>9}{'pdf s':>8}")
+    for size, scenarios in results.items():
+        for scenario, r in scenarios.items():
+            base = baseline.get(size, {}).get(scenario, {}).get("wall_s", "")
+            print(f"{size:<11}{scenario:<17}{r['wall_s']:>9.3f}{base:>9}{r['queries']:>9}{r['rows']:>9}{r['peak_mb']:>9.1f}{r['pdf_s']:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(harness.SIZES), default=list(harness.SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--per-shift", type=int, default=100, help="transactions per seeded shift")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth, 0.25 = 25%%")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--replica", action="store_true", help="run the reports on the local read replica")
+    args = parser.parse_args()
+    if args.replica:
+        os.environ["PAKUNITED_REPLICA"] = "on"
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    pdf_timer = PDFTimer()
+    results = {}
+    for size in args.sizes:
+        dataset = harness.seeded_dataset(size, per_shift=args.per_shift)
+        results[f"{size}-replica" if args.replica else size] = summarize([run_once(size, dataset, pdf_timer) for _ in range(args.repeat)])
+    print_table(results, baseline)
+
+    report = {"per_shift": args.per_shift, "repeat": args.repeat, "python": sys.version.split()[0], "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        failed = errors(results)
+        if failed:
+            for line in failed:
+                print(f"ERROR {line}")
+            print("baseline not written: the run has errors")
+            return 1
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({**report, "results": merged}, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    found = regressions(results, baseline, args.threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Headless app sessions against seeded local datasets.
+
+Shared by the benchmark suite and the load test. Importing this module
+points the app at the local backend (see local_backend.py) with a private
+offline journal, report cache and read replica, so nothing here touches
+Supabase or the files of a running shop. Reports read the backend unless
+PAKUNITED_REPLICA is set to "on" (see bench.py --replica).
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+WORK_DIR = tempfile.mkdtemp(prefix="pakunited-bench-")
+
+os.environ["PAKUNITED_BACKEND"] = "local"
+os.environ["LOCAL_DB_PATH"] = os.path.join(WORK_DIR, "local.db")
+os.environ["OFFLINE_JOURNAL_PATH"] = os.path.join(WORK_DIR, "offline_journal.db")
+os.environ["REPORT_CACHE_PATH"] = os.path.join(WORK_DIR, "report_cache.db")
+os.environ["REPLICA_PATH"] = os.path.join(WORK_DIR, "replica.db")
+os.environ.setdefault("PAKUNITED_REPLICA", "off")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SIZES = {"1m": 30, "1y": 365, "5y": 5 * 365}
+RUN_TIMEOUT = 900
+
+
+def seeded_dataset(size, per_shift=100, seed=0):
+    """Path of a seeded database for the size, generated once per day.
+
+    Seeded data ends today (the app's pages are relative to date.today()),
+    so the file name carries the date and stale files are regenerated.
+    """
+    from local_backend import LocalClient
+    from seed_data import generate
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"{size}-{per_shift}-{seed}-{date.today().isoformat()}.db")
+    if not os.path.exists(path):
+        for name in os.listdir(DATA_DIR):
+            if name.startswith(f"{size}-{per_shift}-{seed}-"):
+                os.remove(os.path.join(DATA_DIR, name))
+        tmp = path + ".tmp"
+        generate(LocalClient(tmp), days=SIZES[size], per_shift=per_shift, seed=seed)
+        _copy_db(tmp, path)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(tmp + suffix):
+                os.remove(tmp + suffix)
+    return path
+
+
+def _copy_db(src, dst):
+    source, target = sqlite3.connect(src), sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def use_dataset(path, in_process=True):
+    """Make the app run on a fresh working copy of a seeded database.
+
+    With in_process, the process-wide resources (client, journal, report
+    cache, replica) and the reference cache of app sessions in this process
+    are reset, as they would be on a server restart. The replica starts out
+    empty.
+    """
+    if in_process:
+        import streamlit as st
+        from cache import reference_cache
+
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        reference_cache.clear()
+        # services binds the client, journal and report cache at import
+        sys.modules.pop("services", None)
+    for name in ("LOCAL_DB_PATH", "OFFLINE_JOURNAL_PATH", "REPORT_CACHE_PATH", "REPLICA_PATH"):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(os.environ[name] + suffix):
+                os.remove(os.environ[name] + suffix)
+    _copy_db(path, os.environ["LOCAL_DB_PATH"])
+
+
+def date_range(size):
+    """(start, end) covering the whole seeded period of a dataset."""
+    return date.today() - timedelta(days=SIZES[size] - 1), date.today()
+
+
+class Session:
+    """One browser session of the app, driven through Streamlit's AppTest."""
+
+    def __init__(self, username="admin", password="admin"):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT)
+        self.app.run()
+        self.app.text_input[0].input(username)
+        self.app.text_input[1].input(password)
+        self.app.button[0].click()
+        self.rerun()
+
+    def rerun(self):
+        """Run the script once (plus any st.rerun() it triggers).
+
+        Returns (seconds, queries, errors) for the interaction.
+        """
+        seen = {run.id for run in self.app.session_state["trace_runs"]} if "trace_runs" in self.app.session_state else set()
+        start = time.perf_counter()
+        self.app.run()
+        elapsed = time.perf_counter() - start
+        runs = [run for run in self.app.session_state["trace_runs"] if run.id not in seen]
+        errors = [e.value for e in self.app.exception] + [e.value for e in self.app.error]
+        return elapsed, [q for run in runs for q in run.queries], errors
+
+    def open(self, page):
+        """Navigate to a page by title, e.g. open("Recording")."""
+        import views
+
+        self.app.switch_page(views.PAGES[page])
+        return self.rerun()
+
+    def set(self, widget, key, value):
+        """Set a widget's value for the next run, e.g. set("date_input", "shift_start", day)."""
+        getattr(self.app, widget)(key=key).set_value(value)
+
+    def click(self, key):
+        self.app.button(key=key).click()
+        return self.rerun()
@@ -0,0 +1,299 @@
+"""Load test: many cashier sessions entering transactions at once.
+
+    python benchmarks/load_test.py                        # 1, 2, 4 and 8 sessions
+    python benchmarks/load_test.py --sessions 4 16 --iterations 5
+
+A real ``streamlit run app.py`` server is started on the local backend and
+every virtual cashier connects to it over Streamlit's websocket protocol,
+as a browser tab would, so all sessions share the server's cached client
+and caches, and each interaction reruns the script (or, for a widget in an
+st.fragment, just that fragment). (AppTest cannot
+be used here: it swaps a process-wide runtime on every run.)
+
+A cashier logs in, then repeatedly opens Recording, adds a sale and submits
+a three-row expense sheet on its shift, and finally closes the shift.
+Cashiers are spread over the three shifts, so several work on (and race to
+close) the same one. For each concurrency level, on a fresh copy of the
+seeded data, it reports rerun latency percentiles, throughput, errors, and
+the write anomalies found afterwards: transactions stored more than once,
+intended ones that never arrived, and duplicate open shifts.
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+import harness
+
+SHIFTS = ["Morning", "Evening", "Night"]
+EXPENSE_ROWS = 3
+SERVER_START_TIMEOUT = 60
+RERUN_TIMEOUT = 300
+
+
+class ServerSession:
+    """A browser tab on a running app server, speaking Streamlit's websocket protocol."""
+
+    def __init__(self, port):
+        from websockets.sync.client import connect
+
+        self._ws = connect(f"ws://localhost:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None, open_timeout=30)
+        self.widgets = {}   # widget id -> (element type, label, id of the st.fragment drawing it)
+        self.values = {}    # widget id -> WidgetState
+        self.pages = {}     # page title -> page script hash, from st.navigation
+        self.page_hash = ""
+        self.rerun()
+
+    def close(self):
+        self._ws.close()
+
+    def _widget_id(self, key=None, label=None):
+        for widget_id, (_, widget_label, _) in self.widgets.items():
+            if key is not None and widget_id.endswith(f"-{key}"):
+                return widget_id
+            if key is None and widget_label == label:
+                return widget_id
+        raise KeyError(key or label)
+
+    def set(self, value, key=None, label=None):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self._widget_id(key, label)
+        state = WidgetState(id=widget_id)
+        if isinstance(value, float):
+            state.double_value = value
+        else:
+            state.string_value = value
+        self.values[widget_id] = state
+
+    def open(self, page):
+        """Navigate to a page by title, as a click in the sidebar navigation would."""
+        self.page_hash = self.pages[page]
+        return self.rerun()
+
+    def click(self, key=None, label=None):
+        """Click a button; inside a fragment, only the fragment reruns (as in a browser)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self._widget_id(key, label)
+        trigger = WidgetState(id=widget_id, trigger_value=True)
+        return self.rerun(trigger, fragment_id=self.widgets[widget_id][2])
+
+    def rerun(self, trigger=None, fragment_id=""):
+        """Rerun the script or one fragment (and any st.rerun() it triggers) and wait for it to finish.
+
+        Returns (seconds, errors).
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_hash
+        msg.rerun_script.fragment_id = fragment_id
+        states = [state for widget_id, state in self.values.items() if widget_id in self.widgets]
+        if trigger is not None:
+            states.append(trigger)
+        msg.rerun_script.widget_states.widgets.extend(states)
+        start = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        errors = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=RERUN_TIMEOUT))
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                errors = []
+                if not forward.new_session.fragment_ids_this_run:
+                    self.widgets = {}
+            elif kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in forward.navigation.app_pages}
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                proto = getattr(element, element_type)
+                if element_type == "exception":
+                    errors.append(f"{proto.type}: {proto.message}")
+                elif element_type == "alert" and proto.format == proto.ERROR:
+                    errors.append(proto.body)
+                elif getattr(proto, "id", "").startswith("$$ID-"):
+                    self.widgets[proto.id] = (element_type, getattr(proto, "label", ""), forward.delta.fragment_id)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start, errors
+
+
+class Cashier:
+    def __init__(self, number, port, iterations, think_time):
+        self.number = number
+        self.port = port
+        self.shift = SHIFTS[number % len(SHIFTS)]
+        self.iterations = iterations
+        self.think_time = think_time
+        self.latencies = []
+        self.errors = []
+        self.tags = []
+
+    def _record(self, result):
+        seconds, errors = result
+        self.latencies.append(seconds)
+        self.errors.extend(errors)
+        if self.think_time:
+            time.sleep(self.think_time)
+
+    def _tag(self):
+        tag = f"load {self.number}-{len(self.tags)}"
+        self.tags.append(tag)
+        return tag
+
+    def run(self):
+        session = None
+        try:
+            session = ServerSession(self.port)
+            session.set("admin", label="Username")
+            session.set("admin", label="Password")
+            self._record(session.click(label="Login"))
+            for _ in range(self.iterations):
+                self._record(session.open("Recording"))
+                session.set(250.0, key=f"sale_amt_{self.shift}")
+                session.set(self._tag(), key=f"sale_desc_{self.shift}")
+                self._record(session.click(key=f"FormSubmitter:sale_{self.shift}-Add Sale"))
+                for _ in range(EXPENSE_ROWS - 1):
+                    self._record(session.click(key=f"exp_add_{self.shift}"))
+                for i in range(EXPENSE_ROWS):
+                    session.set(40.0, key=f"exp_amt_{self.shift}_{i}")
+                    session.set(self._tag(), key=f"exp_desc_{self.shift}_{i}")
+                self._record(session.click(key=f"exp_submit_{self.shift}"))
+            session.set(1000.0, key=f"actual_{self.shift}")
+            self._record(session.click(key=f"close_{self.shift}"))
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            if session is not None:
+                session.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server():
+    """(process, port) of an app server on the harness' local backend."""
+    port = _free_port()
+    log = open(os.path.join(harness.WORK_DIR, f"server-{port}.log"), "w")
+    process = subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", harness.APP_PATH,
+        "--server.headless", "true", "--server.port", str(port),
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ], cwd=harness.ROOT, env=os.environ.copy(), stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"app server did not start, see {log.name}")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def write_anomalies(cashiers):
+    """(duplicate transactions, lost transactions, duplicate open shifts, pending offline ops)."""
+    conn = sqlite3.connect(os.environ["LOCAL_DB_PATH"])
+    try:
+        stored = Counter(d for (d,) in conn.execute("SELECT description FROM transactions WHERE description LIKE 'load %'"))
+        open_shifts = conn.execute("SELECT date, shift, COUNT(*) FROM shifts WHERE status = 'open' GROUP BY date, shift HAVING COUNT(*) > 1").fetchall()
+    finally:
+        conn.close()
+    pending = 0
+    if os.path.exists(os.environ["OFFLINE_JOURNAL_PATH"]):
+        journal = sqlite3.connect(os.environ["OFFLINE_JOURNAL_PATH"])
+        try:
+            pending = journal.execute("SELECT COUNT(*) FROM pending_ops").fetchone()[0]
+        finally:
+            journal.close()
+    intended = [tag for c in cashiers for tag in c.tags]
+    duplicates = sum(n - 1 for n in stored.values() if n > 1)
+    lost = sum(1 for tag in intended if tag not in stored)
+    return duplicates, lost, sum(n - 1 for _, _, n in open_shifts), pending
+
+
+def run_level(dataset, sessions, iterations, think_time):
+    harness.use_dataset(dataset, in_process=False)
+    process, port = start_server()
+    try:
+        cashiers = [Cashier(n, port, iterations, think_time) for n in range(sessions)]
+        threads = [threading.Thread(target=c.run) for c in cashiers]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    latencies = [s for c in cashiers for s in c.latencies]
+    duplicates, lost, duplicate_shifts, pending = write_anomalies(cashiers)
+    errors = [e for c in cashiers for e in c.errors]
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "seconds": round(elapsed, 2),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "duplicate_writes": duplicates,
+        "lost_writes": lost,
+        "duplicate_open_shifts": duplicate_shifts,
+        "pending_offline": pending,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4, 8], help="concurrency levels to run")
+    parser.add_argument("--iterations", type=int, default=3, help="sale + expense sheet rounds per cashier")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a cashier's interactions")
+    parser.add_argument("--size", choices=list(harness.SIZES), default="1m")
+    parser.add_argument("--per-shift", type=int, default=100)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    dataset = harness.seeded_dataset(args.size, per_shift=args.per_shift)
+    results = []
+    print(f"{'sessions':>8}{'reruns':>8}{'rerun/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'dup':>5}{'lost':>6}{'dup shifts':>11}")
+    for sessions in args.sessions:
+        r = run_level(dataset, sessions, args.iterations, args.think_time)
+        results.append(r)
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['throughput']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['errors']:>8}{r['duplicate_writes']:>5}{r['lost_writes']:>6}{r['duplicate_open_shifts']:>11}")
+        for sample in r["error_samples"]:
+            print(f"    {sample}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"size": args.size, "iterations": args.iterations, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
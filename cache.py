@@ -0,0 +1,64 @@
+"""Process-wide TTL cache shared by every Streamlit session.
+
+app.py is re-executed on every rerun, so anything that must outlive a single
+run lives in an imported module like this one.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss or after expiry.
+
+        If loader() fails after expiry, the expired value is returned (e.g.
+        the vendor list while the backend is unreachable) and the lookup is
+        retried on the next call. On a miss its exception propagates.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        try:
+            value = loader()
+        except Exception:
+            if entry:
+                return entry[1]
+            raise
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+
+# Settings, vendors and expense heads; cleared whenever one of them is written.
+reference_cache = TTLCache(ttl=300)
@@ -0,0 +1,115 @@
+"""Monthly opening-balance checkpoints for running-balance reports.
+
+The Vendor Report and Personal Ledger show running balances. Rather than
+starting every range at zero (or scanning all history), the balance at the
+start of each month is stored in ``balance_checkpoints`` (see
+migrations/0003_balance_checkpoints.sql), one series per ledger:
+
+- ``vendor:all`` and ``vendor:<id>``: credit purchases owed, less vendor payments and returns
+- ``jaib``: money put in from the owner's pocket, less withdrawals
+
+opening_balance() starts from the nearest checkpoint at or before the range
+start and only scans the rows after it, writing checkpoints for any month
+boundaries it crosses on the way. Transactions get their created_at from the
+server when they are inserted (queued offline writes included), so the
+balance at the start of a past month does not change once recorded. A client
+that may still miss rows (the read replica, see Replica.synced_through) only
+gets checkpoints for months starting before the time it holds every row up to.
+"""
+import heapq
+from datetime import date, timedelta
+
+from models import Transaction
+from queries import prefetch_records, stream_records
+
+VENDOR_TYPES = ["purchase", "vendor_payment", "return"]
+BALANCE_COLUMNS = "id, created_at, type, source, amount"
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def next_month(d):
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def vendor_ledger(vendor_id=0):
+    return "vendor:all" if vendor_id == 0 else f"vendor:{vendor_id}"
+
+
+def vendor_delta(t):
+    if t.type == "purchase":
+        return t.amount if t.source == "credit" else 0
+    if t.type in ("vendor_payment", "return"):
+        return -t.amount
+    return 0
+
+
+def jaib_delta(t):
+    # Rows of the "jaib" stream; withdrawals have their own stream (see ledger_rows)
+    return -t.amount if t.type == "withdrawal" else t.amount
+
+
+def ledger_rows(client, ledger, start, end, columns=BALANCE_COLUMNS):
+    """(Transaction, balance delta) pairs of a ledger with start <= created_at < end, in created_at order.
+
+    start/end are ISO strings; start may be None for "from the beginning".
+    """
+    def ranged(query):
+        if start:
+            query = query.gte("created_at", start)
+        return query.lt("created_at", end)
+
+    if ledger == "jaib":
+        jaib = ((t, jaib_delta(t)) for t in prefetch_records(lambda: ranged(client.table("transactions").select(columns).eq("source", "jaib")), Transaction))
+        withdrawals = ((t, -t.amount) for t in prefetch_records(lambda: ranged(client.table("transactions").select(columns).eq("type", "withdrawal")), Transaction))
+        return heapq.merge(jaib, withdrawals, key=lambda pair: pair[0].created_at)
+
+    def vendor_query():
+        query = ranged(client.table("transactions").select(columns).in_("type", VENDOR_TYPES))
+        if ledger != "vendor:all":
+            query = query.eq("vendor_id", ledger.split(":", 1)[1])
+        return query
+    return ((t, vendor_delta(t)) for t in stream_records(vendor_query, Transaction))
+
+
+def opening_balance(client, ledger, start_date, synced_through=None):
+    """Balance of the ledger from all transactions created before start_date.
+
+    synced_through is the ISO time before which client holds every
+    transaction, if it may lack newer ones; no checkpoint is written after it.
+    """
+    target = month_start(start_date)
+    latest = client.table("balance_checkpoints").select("month, balance").eq("ledger", ledger).lte("month", target.isoformat()).order("month", desc=True).limit(1).execute().data
+    if latest:
+        month, balance = date.fromisoformat(latest[0]["month"]), float(latest[0]["balance"])
+    else:
+        month, balance = None, 0.0
+    new_checkpoints = []
+    start = month.isoformat() if month else None
+    for t, delta in ledger_rows(client, ledger, start, start_date.isoformat()):
+        day = date.fromisoformat(t.created_at[:10])
+        if month is None:
+            month = month_start(day)
+            new_checkpoints.append((month, 0.0))
+        while month < target and next_month(month) <= day:
+            month = next_month(month)
+            new_checkpoints.append((month, balance))
+        balance += delta
+    if month is None:
+        month = target
+        new_checkpoints.append((month, 0.0))
+    while month < target:
+        month = next_month(month)
+        new_checkpoints.append((month, balance))
+    # Month starts up to the current one only cover finished months, so they are final.
+    current = month_start(date.today())
+    rows = [{"ledger": ledger, "month": m.isoformat(), "balance": b} for m, b in new_checkpoints
+            if m <= current and (synced_through is None or m.isoformat() < synced_through)]
+    if rows:
+        try:
+            client.table("balance_checkpoints").upsert(rows).execute()
+        except Exception:
+            pass  # checkpoints are an optimisation; the balance above is still correct
+    return balance
@@ -0,0 +1,115 @@
+"""Running a page's independent reads at the same time.
+
+The Supabase client is synchronous, so a page that needs several unrelated
+reads pays for each round trip in turn. gather() runs callables on a
+process-wide thread pool and waits for all of them, and prefetch() runs
+an iterator (such as a query's pages, see queries.prefetch_records) in a
+background thread while the caller consumes another, so a page waits
+about as long as its slowest read. Queries made in the workers are traced
+against the run of the page that started them.
+
+Workers must not call Streamlit; they only fetch and compute.
+"""
+import queue
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import tracer
+
+MAX_WORKERS = 8
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="reads")
+_worker = threading.local()
+
+
+def _traced(fn):
+    run = tracer.current_run()
+
+    def call():
+        with tracer.using(run):
+            return fn()
+    return call
+
+
+def _in_worker(fn):
+    def call():
+        _worker.active = True
+        return fn()
+    return call
+
+
+def submit(fn):
+    """Start fn() on the pool and return its Future."""
+    return _pool.submit(_in_worker(_traced(fn)))
+
+
+def gather(*fns, return_exceptions=False):
+    """Results of calling each fn, run concurrently, in argument order.
+
+    With return_exceptions, a failed call's exception is returned in its
+    place, so callers can keep handling each read's failure separately.
+    Called from a pool worker, the calls run in turn instead: a worker
+    waiting on the pool could otherwise wait forever on a full pool.
+    """
+    if getattr(_worker, "active", False):
+        calls = fns
+    else:
+        calls = [submit(fn).result for fn in fns]
+    results = []
+    for call in calls:
+        try:
+            results.append(call())
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+
+def prefetch(iterable, buffer=1):
+    """Iterate over iterable in a background thread, up to buffer items ahead.
+
+    The producer starts right away (not on the first next()), and stops if
+    the returned iterator is closed or dropped early.
+    """
+    items = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(("item", item)):
+                    return
+        except Exception as e:
+            put(("error", e))
+            return
+        put(("end", None))
+
+    threading.Thread(target=_traced(produce), daemon=True, name="prefetch").start()
+
+    def consume():
+        try:
+            while True:
+                kind, value = items.get()
+                if kind == "error":
+                    raise value
+                if kind == "end":
+                    return
+                yield value
+        finally:
+            stop.set()
+    rows = consume()
+    # A generator dropped before its first next() never runs its finally
+    weakref.finalize(rows, stop.set)
+    return rows
+
@@ -0,0 +1,182 @@
+"""CSV and PDF export for reports.
+
+table_files() consumes a report's row generator once, writing each chunk
+of rows to both the CSV and the PDF table; the files are spooled temporary
+files, which stay in memory for small reports and spill to disk for large
+ones. The PDF table repeats its header row at the top of every page. Pages
+hand the files to st.download_button through reader(), so their bytes are
+only read when a download is clicked.
+
+PDFs use a Unicode TrueType font (so "₹" renders) when one is available:
+PDF_FONT_PATH / PDF_BOLD_FONT_PATH, or DejaVu Sans from the usual system
+locations. The font is looked up and parsed once per process; each PDF
+gets a copy of the parsed font (fpdf2 subsets a font's file in place when it
+writes the PDF, so every copy reopens the file, which is cheap as its tables
+are read lazily). Without one, the core Helvetica font is used and text is
+reduced to Latin-1.
+"""
+import copy
+import csv
+import io
+import os
+import tempfile
+from functools import lru_cache
+from itertools import islice
+
+from fontTools import ttLib
+from fpdf import FPDF
+
+CHUNK_SIZE = 1000
+SPOOL_SIZE = 4 * 1024 * 1024  # bytes kept in memory before a file spills to disk
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/DejaVuSans.ttf",
+    "C:/Windows/Fonts/DejaVuSans.ttf",
+]
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@lru_cache(maxsize=1)
+def unicode_fonts():
+    """(regular, bold) TrueType paths, or None if no Unicode font is available."""
+    regular = os.environ.get("PDF_FONT_PATH") or next((p for p in FONT_CANDIDATES if os.path.exists(p)), None)
+    if not regular or not os.path.exists(regular):
+        return None
+    bold = os.environ.get("PDF_BOLD_FONT_PATH") or regular.replace("DejaVuSans.ttf", "DejaVuSans-Bold.ttf")
+    return regular, bold if os.path.exists(bold) else regular
+
+
+@lru_cache(maxsize=None)
+def _parsed_font(path, style):
+    """fpdf2's TTFFont of the file (cmap, glyph widths, descriptor), parsed once."""
+    pdf = FPDF()
+    pdf.add_font("Unicode", style, path)
+    font = pdf.fonts.popitem()[1]
+    font.close()
+    return font
+
+
+def reader(file):
+    """Callable returning the file's contents, for st.download_button's data (read on click)."""
+    def read():
+        file.seek(0)
+        return file.read()
+    return read
+
+
+class ReportPDF(FPDF):
+    def __init__(self, shop_details, title, date_range_str):
+        super().__init__()
+        self.shop_details = shop_details
+        self.report_title = title
+        self.date_range_str = date_range_str
+        self.table_columns = None
+        self.col_width = 0
+        fonts = unicode_fonts()
+        if fonts:
+            self.add_parsed_font("", fonts[0])
+            self.add_parsed_font("B", fonts[1])
+            self.report_font = "Unicode"
+        else:
+            self.report_font = "Helvetica"
+        self.set_auto_page_break(True, margin=15)
+
+    def add_parsed_font(self, style, path):
+        """add_font("Unicode", style, path) without parsing the font file again."""
+        font = copy.deepcopy(_parsed_font(path, style))  # shares only the parsed file (ttfont)
+        font.i = len(self.fonts) + 1
+        font.ttfont = ttLib.TTFont(font.ttffile, recalcTimestamp=False, fontNumber=font.collection_font_number, lazy=True)
+        self.fonts[font.fontkey] = font
+
+    def text_of(self, value):
+        text = str(value)
+        if self.report_font == "Unicode":
+            return text
+        return text.replace("₹", "Rs.").encode("latin-1", "replace").decode("latin-1")
+
+    def header(self):
+        if self.page == 1:
+            self.set_font(self.report_font, "B", 16)
+            self.cell(0, 10, self.text_of(self.shop_details["name"]), new_x="LMARGIN", new_y="NEXT", align="C")
+            self.set_font(self.report_font, "", 10)
+            self.cell(0, 6, self.text_of(self.shop_details["address"]), new_x="LMARGIN", new_y="NEXT", align="C")
+            self.cell(0, 6, self.text_of(self.report_title), new_x="LMARGIN", new_y="NEXT", align="C")
+            self.cell(0, 6, self.text_of(f"Date Range: {self.date_range_str}"), new_x="LMARGIN", new_y="NEXT", align="C")
+            self.ln(5)
+        if self.table_columns:
+            self.table_header()
+
+    def table_header(self):
+        self.set_font(self.report_font, "B", 10)
+        for col in self.table_columns:
+            self.cell(self.col_width, 8, self.text_of(col), border=1)
+        self.ln()
+        self.set_font(self.report_font, "", 9)
+
+    def start_table(self, columns):
+        self.table_columns = columns
+        self.col_width = self.w / (len(columns) + 1) if len(columns) < 6 else self.w / (len(columns) + 0.5)
+        self.table_header()
+
+    def table_rows(self, rows, h=6):
+        # rect() + text() instead of one cell() per value: same layout, several times faster
+        baseline = h / 2 + 0.3 * self.font_size
+        for row in rows:
+            if self.will_page_break(h):
+                self.add_page()
+            x, y = self.l_margin, self.get_y()
+            for item in row:
+                self.rect(x, y, self.col_width, h)
+                self.text(x + self.c_margin, y + baseline, self.text_of(item))
+                x += self.col_width
+            self.set_y(y + h)
+
+
+def _spooled(pdf):
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    pdf.output(out)
+    out.seek(0)
+    return out
+
+
+def table_files(title, date_range_str, columns, rows, shop_details):
+    """(CSV, PDF) spooled files of the report rows, or (None, None) if there are none.
+
+    rows may be a generator; it is consumed once, CHUNK_SIZE rows at a time.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    pdf = None
+    for chunk in _chunks(rows):
+        if pdf is None:
+            pdf = ReportPDF(shop_details, title, date_range_str)
+            pdf.add_page()
+            pdf.start_table(columns)
+        writer.writerows(chunk)
+        pdf.table_rows(chunk)
+    text.detach()
+    if pdf is None:
+        out.close()
+        return None, None
+    out.seek(0)
+    return out, _spooled(pdf)
+
+
+def summary_pdf(title, date_range_str, lines, shop_details):
+    """A titled list of "Label: value" lines, as used by the Profit & Loss statement."""
+    pdf = ReportPDF(shop_details, title, date_range_str)
+    pdf.add_page()
+    pdf.ln(5)
+    pdf.set_font(pdf.report_font, "B", 12)
+    for line in lines:
+        pdf.cell(0, 10, pdf.text_of(line), new_x="LMARGIN", new_y="NEXT")
+    return _spooled(pdf)
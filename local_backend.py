@@ -0,0 +1,501 @@
+"""SQLite-backed stand-in for the Supabase client.
+
+LocalClient implements the part of the supabase-py query builder the app
+uses: ``table().select/insert/update/upsert/delete`` with ``eq``, ``neq``,
+``gt``, ``gte``, ``lt``, ``lte``, ``in_``, ``or_``, ``order``, ``limit`` and
+``range``, plus embedded selects such as ``*, expense_heads(name)``, and
+``rpc()`` for the Postgres functions of migrations/0005_shift_rpc.sql and
+0008_rollup_writes.sql (whose trigger is mirrored too). It is selected with
+PAKUNITED_BACKEND=local (database file: LOCAL_DB_PATH, default local.db;
+":memory:" works too) and lets the app, benchmarks and load tests run
+without Supabase credentials. LOCAL_LATENCY_MS adds a simulated network
+round trip to every query. See seed_data.py for realistic data.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS vendors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS expense_heads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS shifts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    opening_cash REAL NOT NULL DEFAULT 0,
+    expected_closing REAL DEFAULT 0,
+    actual_closing REAL DEFAULT 0,
+    shortage REAL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shift_id INTEGER REFERENCES shifts (id),
+    type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    source TEXT,
+    description TEXT,
+    expense_head_id INTEGER REFERENCES expense_heads (id),
+    vendor_id INTEGER REFERENCES vendors (id),
+    payment_method TEXT,
+    idempotency_key TEXT UNIQUE,
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    shift_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    type TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    total REAL NOT NULL DEFAULT 0,
+    txn_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (shift_id, type, source)
+);
+CREATE TABLE IF NOT EXISTS balance_checkpoints (
+    ledger TEXT NOT NULL,
+    month TEXT NOT NULL,
+    balance REAL NOT NULL,
+    PRIMARY KEY (ledger, month)
+);
+CREATE INDEX IF NOT EXISTS transactions_shift_id_idx ON transactions (shift_id);
+CREATE INDEX IF NOT EXISTS transactions_created_at_idx ON transactions (created_at, id);
+CREATE INDEX IF NOT EXISTS transactions_type_created_at_idx ON transactions (type, created_at, id);
+CREATE INDEX IF NOT EXISTS transactions_source_created_at_idx ON transactions (source, created_at, id) WHERE source IS NOT NULL;
+CREATE INDEX IF NOT EXISTS transactions_expense_head_created_at_idx ON transactions (expense_head_id, created_at, id) WHERE expense_head_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS transactions_vendor_created_at_idx ON transactions (vendor_id, created_at, id) WHERE vendor_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS shifts_date_idx ON shifts (date, shift, status);
+CREATE INDEX IF NOT EXISTS shifts_closed_created_at_idx ON shifts (created_at) WHERE status = 'closed';
+CREATE UNIQUE INDEX IF NOT EXISTS shifts_one_open_idx ON shifts (date, shift) WHERE status = 'open';
+-- Late transactions of closed shifts are added to their rollup (migrations/0008_rollup_writes.sql)
+CREATE TRIGGER IF NOT EXISTS transactions_roll_up_late AFTER INSERT ON transactions
+WHEN (SELECT status FROM shifts WHERE id = NEW.shift_id) = 'closed'
+BEGIN
+    INSERT INTO daily_rollups (shift_id, date, shift, type, source, total, txn_count)
+    SELECT id, date, shift, NEW.type, COALESCE(NEW.source, ''), NEW.amount, 1 FROM shifts WHERE id = NEW.shift_id
+    ON CONFLICT (shift_id, type, source) DO UPDATE SET total = total + excluded.total, txn_count = txn_count + 1;
+END;
+"""
+# Tables with an updated_at column, kept current as Postgres' trigger does (migrations/0004_updated_at.sql)
+UPDATED_AT_TABLES = ["shifts", "transactions", "vendors", "expense_heads"]
+
+PRIMARY_KEYS = {
+    "settings": ["key"],
+    "daily_rollups": ["shift_id", "type", "source"],
+    "balance_checkpoints": ["ledger", "month"],
+}
+BOOL_COLUMNS = {"is_active"}
+# Embedded relation -> foreign key column on the selecting table
+RELATIONS = {"expense_heads": "expense_head_id", "vendors": "vendor_id", "shifts": "shift_id"}
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def now_iso():
+    # Fixed-width timestamps keep string order equal to time order, as (created_at, id) keysets need.
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class APIResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+
+def _rows(cursor):
+    names = [d[0] for d in cursor.description]
+    rows = []
+    for values in cursor.fetchall():
+        row = dict(zip(names, values))
+        for column in BOOL_COLUMNS & row.keys():
+            row[column] = bool(row[column])
+        rows.append(row)
+    return rows
+
+
+def _split_top_level(text):
+    parts, depth, current, quoted = [], 0, "", False
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    if current:
+        parts.append(current)
+    return [p.strip() for p in parts]
+
+
+def _unquote(value):
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _parse_logic(expr, joiner="OR"):
+    """PostgREST logic-tree syntax (as passed to or_()) -> (sql, params)."""
+    clauses, params = [], []
+    for part in _split_top_level(expr):
+        group = re.match(r"^(and|or)\((.*)\)$", part)
+        if group:
+            sql, sub = _parse_logic(group.group(2), group.group(1).upper())
+            clauses.append(f"({sql})")
+            params.extend(sub)
+            continue
+        column, op, value = part.split(".", 2)
+        if op == "in":
+            values = [_unquote(v) for v in _split_top_level(value.strip("()"))]
+            clauses.append(f'"{column}" IN ({", ".join("?" * len(values))})' if values else "0")
+            params.extend(values)
+        elif op == "is":
+            clauses.append(f'"{column}" IS {"NULL" if value == "null" else value.upper()}')
+        else:
+            clauses.append(f'"{column}" {OPERATORS[op]} ?')
+            params.append(_unquote(value))
+    return f" {joiner} ".join(clauses), params
+
+
+def _parse_select(columns):
+    """'*, expense_heads(name)' -> (['*'], {'expense_heads': ['name']})."""
+    plain, embedded = [], {}
+    for part in _split_top_level(columns or "*"):
+        relation = re.match(r"^(\w+)\((.*)\)$", part)
+        if relation:
+            embedded[relation.group(1)] = [c.strip() for c in relation.group(2).split(",")]
+        else:
+            plain.append(part)
+    return plain or ["*"], embedded
+
+
+class LocalQuery:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # ----- actions -----
+    def select(self, columns="*", *args, **kwargs):
+        self._action, self._columns = "select", columns
+        return self
+
+    def insert(self, data, *args, **kwargs):
+        self._action, self._payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False, *args, **kwargs):
+        self._action, self._payload = "upsert", data
+        self._on_conflict, self._ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, data, *args, **kwargs):
+        self._action, self._payload = "update", data
+        return self
+
+    def delete(self, *args, **kwargs):
+        self._action = "delete"
+        return self
+
+    # ----- filters -----
+    def _compare(self, column, op, value):
+        self._where.append(f'"{column}" {OPERATORS[op]} ?')
+        self._params.append(value)
+        return self
+
+    def eq(self, column, value):
+        return self._compare(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._compare(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._compare(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._compare(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._compare(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._compare(column, "lte", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        self._where.append(f'"{column}" IN ({", ".join("?" * len(values))})' if values else "0")
+        self._params.extend(values)
+        return self
+
+    def or_(self, filters, *args, **kwargs):
+        sql, params = _parse_logic(filters)
+        self._where.append(f"({sql})")
+        self._params.extend(params)
+        return self
+
+    def order(self, column, desc=False, *args, **kwargs):
+        self._order.append(f'"{column}" {"DESC" if desc else "ASC"}')
+        return self
+
+    def limit(self, size, *args, **kwargs):
+        self._limit = size
+        return self
+
+    def range(self, start, end, *args, **kwargs):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    # ----- execution -----
+    def _where_sql(self):
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _prepare(self, row):
+        row = dict(row)
+        if self._table in ("users", "vendors", "expense_heads", "shifts", "transactions"):
+            row.setdefault("created_at", now_iso())
+        if self._table in UPDATED_AT_TABLES:
+            row.setdefault("updated_at", row["created_at"])
+        if self._table == "daily_rollups" and row.get("source") is None:
+            row["source"] = ""
+        return row
+
+    def execute(self):
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        with self._client.lock:
+            conn = self._client.conn
+            if self._action == "select":
+                data = self._select(conn)
+            elif self._action in ("insert", "upsert"):
+                data = self._write(conn)
+            elif self._action == "update":
+                payload = dict(self._payload)
+                if self._table in UPDATED_AT_TABLES:
+                    payload["updated_at"] = now_iso()
+                sets = ", ".join(f'"{k}" = ?' for k in payload)
+                cursor = conn.execute(f'UPDATE "{self._table}" SET {sets}{self._where_sql()} RETURNING *', [*payload.values(), *self._params])
+                data = _rows(cursor)
+            else:
+                cursor = conn.execute(f'DELETE FROM "{self._table}"{self._where_sql()} RETURNING *', self._params)
+                data = _rows(cursor)
+            conn.commit()
+        return APIResponse(data)
+
+    def _select(self, conn):
+        plain, embedded = _parse_select(self._columns)
+        columns = ", ".join(c if c == "*" else _quote(c) for c in plain)
+        fks = [RELATIONS[r] for r in embedded if "*" not in plain and RELATIONS[r] not in plain]
+        if fks:
+            columns += ", " + ", ".join(map(_quote, fks))
+        sql = f'SELECT {columns} FROM "{self._table}"{self._where_sql()}'
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += f" LIMIT {int(self._limit)}"
+            if self._offset:
+                sql += f" OFFSET {int(self._offset)}"
+        rows = _rows(conn.execute(sql, self._params))
+        for relation, rel_columns in embedded.items():
+            fk = RELATIONS[relation]
+            ids = sorted({r[fk] for r in rows if r.get(fk) is not None})
+            related = {}
+            if ids:
+                wanted = "*" if "*" in rel_columns else ", ".join(map(_quote, {"id", *rel_columns}))
+                cursor = conn.execute(f'SELECT {wanted} FROM "{relation}" WHERE id IN ({", ".join("?" * len(ids))})', ids)
+                for rel in _rows(cursor):
+                    related[rel["id"]] = rel if "*" in rel_columns else {c: rel[c] for c in rel_columns}
+            for r in rows:
+                r[relation] = related.get(r.get(fk))
+        for fk in fks:
+            for r in rows:
+                r.pop(fk, None)
+        return rows
+
+    def _write(self, conn):
+        rows = [self._prepare(r) for r in (self._payload if isinstance(self._payload, list) else [self._payload])]
+        if not rows:
+            return []
+        names = list(dict.fromkeys(k for r in rows for k in r))
+        sql = f'INSERT INTO "{self._table}" ({", ".join(map(_quote, names))}) VALUES ({", ".join("?" * len(names))})'
+        if self._action == "upsert":
+            conflict = [c.strip() for c in self._on_conflict.split(",")] if self._on_conflict else PRIMARY_KEYS.get(self._table, ["id"])
+            updates = [n for n in names if n not in conflict]
+            if self._ignore_duplicates or not updates:
+                sql += f' ON CONFLICT ({", ".join(conflict)}) DO NOTHING'
+            else:
+                sql += f' ON CONFLICT ({", ".join(conflict)}) DO UPDATE SET ' + ", ".join(f'"{n}" = excluded."{n}"' for n in updates)
+        sql += " RETURNING *"
+        data = []
+        for r in rows:
+            data.extend(_rows(conn.execute(sql, [r.get(n) for n in names])))
+        return data
+
+
+# ----- rpc functions (migrations/0005_shift_rpc.sql, 0007, 0008), run in one transaction -----
+SHIFT_NAMES = ["Morning", "Evening", "Night"]
+
+
+def _closing_of(conn, day, shift_name):
+    row = conn.execute(
+        "SELECT actual_closing FROM shifts WHERE date = ? AND shift = ? AND status = 'closed' ORDER BY created_at LIMIT 1",
+        (day, shift_name),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _open_shifts(conn, p_date, p_shifts):
+    prev_day = (date.fromisoformat(p_date) - timedelta(days=1)).isoformat()
+    for shift_name in p_shifts:
+        if conn.execute("SELECT 1 FROM shifts WHERE date = ? AND shift = ? AND status = 'open'", (p_date, shift_name)).fetchone():
+            continue
+        idx = SHIFT_NAMES.index(shift_name)
+        opening = _closing_of(conn, p_date, SHIFT_NAMES[idx - 1]) if idx > 0 else None
+        if opening is None:
+            opening = _closing_of(conn, prev_day, "Night")
+        created = now_iso()
+        conn.execute(
+            "INSERT INTO shifts (date, shift, opening_cash, status, created_at, updated_at) VALUES (?, ?, ?, 'open', ?, ?) "
+            "ON CONFLICT (date, shift) WHERE status = 'open' DO NOTHING",
+            (p_date, shift_name, opening or 0.0, created, created),
+        )
+    marks = ", ".join("?" * len(p_shifts))
+    shifts = _rows(conn.execute(f"SELECT * FROM shifts WHERE date = ? AND shift IN ({marks}) AND status = 'open'", [p_date, *p_shifts]))
+    return sorted(shifts, key=lambda s: p_shifts.index(s["shift"]))
+
+
+def _close_shift(conn, p_shift_id, p_actual_cash):
+    shifts = _rows(conn.execute("SELECT * FROM shifts WHERE id = ?", (p_shift_id,)))
+    if not shifts or shifts[0]["status"] != "open":
+        # Only the call that closes the shift gets it back (migrations/0007_close_shift_once.sql)
+        return []
+    shift = shifts[0]
+    (expected,) = conn.execute(
+        """SELECT ? + COALESCE(SUM(CASE
+               WHEN type = 'sale' THEN amount
+               WHEN type = 'return' THEN -amount
+               WHEN type IN ('expense', 'vendor_payment', 'purchase', 'withdrawal') AND source = 'sales' THEN -amount
+               ELSE 0 END), 0)
+           FROM transactions WHERE shift_id = ?""",
+        (shift["opening_cash"], p_shift_id),
+    ).fetchone()
+    closed = _rows(conn.execute(
+        "UPDATE shifts SET expected_closing = ?, actual_closing = ?, shortage = ?, status = 'closed', updated_at = ? WHERE id = ? RETURNING *",
+        (expected, p_actual_cash, p_actual_cash - expected, now_iso(), p_shift_id),
+    ))
+    conn.execute("DELETE FROM daily_rollups WHERE shift_id = ?", (p_shift_id,))
+    conn.execute(
+        "INSERT INTO daily_rollups (shift_id, date, shift, type, source, total, txn_count) "
+        "SELECT ?, ?, ?, type, COALESCE(source, ''), SUM(amount), COUNT(*) FROM transactions WHERE shift_id = ? "
+        "GROUP BY type, COALESCE(source, '')",
+        (p_shift_id, shift["date"], shift["shift"], p_shift_id),
+    )
+    return closed
+
+
+def _rebuild_rollups(conn, p_shift_ids):
+    marks = ", ".join("?" * len(p_shift_ids))
+    closed = [row[0] for row in conn.execute(f"SELECT id FROM shifts WHERE id IN ({marks}) AND status = 'closed'", p_shift_ids)]
+    if not closed:
+        return []
+    marks = ", ".join("?" * len(closed))
+    conn.execute(f"DELETE FROM daily_rollups WHERE shift_id IN ({marks})", closed)
+    conn.execute(
+        "INSERT INTO daily_rollups (shift_id, date, shift, type, source, total, txn_count) "
+        "SELECT s.id, s.date, s.shift, t.type, COALESCE(t.source, ''), SUM(t.amount), COUNT(*) "
+        f"FROM shifts s JOIN transactions t ON t.shift_id = s.id WHERE s.id IN ({marks}) "
+        "GROUP BY s.id, s.date, s.shift, t.type, COALESCE(t.source, '')",
+        closed,
+    )
+    return closed
+
+
+RPC_FUNCTIONS = {"open_shifts": _open_shifts, "close_shift": _close_shift, "rebuild_rollups": _rebuild_rollups}
+
+
+class LocalRpc:
+    def __init__(self, client, fn, params):
+        self._client = client
+        self._fn = RPC_FUNCTIONS[fn]
+        self._params = params
+
+    def execute(self):
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        with self._client.lock:
+            conn = self._client.conn
+            try:
+                data = self._fn(conn, **self._params)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+        return APIResponse(data)
+
+
+class LocalClient:
+    def __init__(self, path="local.db", latency_ms=None):
+        self.path = path
+        # Simulated network round trip per query (LOCAL_LATENCY_MS), slept outside the lock
+        if latency_ms is None:
+            latency_ms = float(os.environ.get("LOCAL_LATENCY_MS", 0))
+        self.latency = latency_ms / 1000
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        for table in UPDATED_AT_TABLES:
+            # Databases created before updated_at existed
+            if "updated_at" not in {row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')}:
+                self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN updated_at TEXT')
+                self.conn.execute(f'UPDATE "{table}" SET updated_at = created_at')
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_updated_at_idx ON "{table}" (updated_at, id)')
+        self.conn.commit()
+
+    def table(self, name):
+        return LocalQuery(self, name)
+
+    def rpc(self, fn, params=None, *args, **kwargs):
+        return LocalRpc(self, fn, params or {})
@@ -0,0 +1,161 @@
+"""Apply migrations/*.sql to Postgres and check the hot queries use an index.
+
+    DATABASE_URL=postgresql://... python migrate.py apply
+    python migrate.py status
+    python migrate.py check
+
+apply runs the files not yet recorded in ``schema_migrations``, in name
+order, each in its own transaction. Every migration is idempotent, so a
+database the files were applied to by hand (before this table existed) is
+brought up to date by simply running apply once.
+
+check ANALYZEs the tables, then EXPLAINs each of HOT_QUERIES (the filters
+and orderings the app sends through PostgREST) with sequential scans
+disabled, so a Seq Scan in a plan means no index can serve that query. An
+index scan without an index condition on a full (not partial) index, e.g.
+walking the primary key to get id order and filtering every row, reads the
+whole table as well and counts the same. It exits non-zero if any query
+still plans either. Run it against a database with representative data (a
+staging copy, or a local Postgres loaded with seed_data.py's rows): on empty
+tables every plan costs nothing and the planner's choices mean little.
+
+Needs psycopg (``pip install "psycopg[binary]"``); the app itself does not.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+HISTORY = """
+create table if not exists schema_migrations (
+    version text primary key,
+    applied_at timestamptz not null default now()
+)
+"""
+
+# name -> SQL equivalent to the PostgREST request (same filters, order and limit)
+HOT_QUERIES = {
+    "shift transactions": "select shift_id, type, source, amount from transactions where shift_id in (1, 2, 3) order by id limit 1000",
+    "expense report": "select id, created_at, description, amount from transactions where type = 'expense' and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "expense report next page": "select id, created_at, description, amount from transactions where type = 'expense' and created_at >= current_date - 7 and created_at <= current_date + 1 and (created_at > current_date - 3 or (created_at = current_date - 3 and id > 1000)) order by created_at, id limit 1000",
+    "expense report, one head": "select id, created_at, description, amount from transactions where type = 'expense' and expense_head_id = 1 and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "vendor report": "select id, created_at, type, source, description, amount from transactions where type in ('purchase', 'vendor_payment', 'return') and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "vendor report, one vendor": "select id, created_at, type, source, description, amount from transactions where type in ('purchase', 'vendor_payment', 'return') and vendor_id = 1 and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "personal ledger": "select id, created_at, type, source, description, amount from transactions where source = 'jaib' and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "withdrawals": "select id, created_at, type, description, amount from transactions where type = 'withdrawal' and created_at >= current_date - 7 and created_at <= current_date + 1 order by created_at, id limit 1000",
+    "dashboard shifts": "select id, status from shifts where date = current_date",
+    "last closed shift": "select actual_closing from shifts where status = 'closed' order by created_at desc limit 1",
+    "shift report": "select id, date, shift, shortage, expected_closing, actual_closing, created_at from shifts where date >= current_date - 7 and date <= current_date and shift = 'Morning' order by created_at, id limit 1000",
+    "range closed": "select id from shifts where status = 'open' and date >= current_date - 7 and date <= current_date limit 1",
+    "previous closed shift": "select actual_closing from shifts where date = current_date - 1 and shift = 'Night' and status = 'closed' order by created_at limit 1",
+    "rollups": "select shift_id, type, source, total from daily_rollups where shift_id in (1, 2, 3)",
+    "opening balance": "select month, balance from balance_checkpoints where ledger = 'jaib' and month <= current_date order by month desc limit 1",
+    "replica sync": "select * from transactions where updated_at >= current_date order by updated_at, id limit 1000",
+    "login": "select id, username, role from users where username = 'admin' and password = 'admin'",
+}
+ANALYZED_TABLES = ["transactions", "shifts", "daily_rollups", "balance_checkpoints", "users"]
+
+
+def connect(database_url):
+    try:
+        import psycopg
+    except ImportError:
+        sys.exit('migrate.py needs psycopg: pip install "psycopg[binary]"')
+    return psycopg.connect(database_url, autocommit=True)
+
+
+def migration_files():
+    return sorted(MIGRATIONS_DIR.glob("*.sql"))
+
+
+def applied(conn):
+    """{version: applied_at} of the migrations recorded in schema_migrations."""
+    conn.execute(HISTORY)
+    return dict(conn.execute("select version, applied_at from schema_migrations").fetchall())
+
+
+def pending(conn):
+    done = applied(conn)
+    return [path for path in migration_files() if path.stem not in done]
+
+
+def apply(conn):
+    """Run the pending migrations in order; returns their versions."""
+    versions = []
+    for path in pending(conn):
+        with conn.transaction():
+            conn.execute(path.read_text())
+            conn.execute("insert into schema_migrations (version) values (%s)", (path.stem,))
+        versions.append(path.stem)
+    return versions
+
+
+def empty_tables(conn, tables=ANALYZED_TABLES):
+    return [name for (name,) in conn.execute("select relname from pg_class where relname = any(%s) and reltuples <= 0", (tables,))]
+
+
+def partial_indexes(conn):
+    return {name for (name,) in conn.execute("select indexrelid::regclass::text from pg_index where indpred is not null")}
+
+
+def full_scans(plan, partial=frozenset()):
+    """Relations a JSON EXPLAIN plan node (or any node under it) reads in full."""
+    node = plan["Node Type"]
+    if node == "Seq Scan":
+        found = [plan["Relation Name"]]
+    elif node in ("Index Scan", "Index Only Scan") and "Index Cond" not in plan and plan["Index Name"] not in partial:
+        found = [f'{plan["Relation Name"]} (all of {plan["Index Name"]})']
+    else:
+        found = []
+    for child in plan.get("Plans", []):
+        found.extend(full_scans(child, partial))
+    return found
+
+
+def check(conn, queries=HOT_QUERIES):
+    """{query name: relations it reads in full} for the queries no index can serve."""
+    for table in ANALYZED_TABLES:
+        conn.execute(f"analyze {table}")
+    partial = partial_indexes(conn)
+    failures = {}
+    with conn.transaction():
+        conn.execute("set local enable_seqscan = off")
+        for name, sql in queries.items():
+            [(explained,)] = conn.execute(f"explain (format json) {sql}").fetchall()
+            scanned = full_scans(explained[0]["Plan"], partial)
+            if scanned:
+                failures[name] = scanned
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["apply", "status", "check"])
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"),
+                        help="Postgres connection string (default: $DATABASE_URL)")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("set DATABASE_URL or pass --database-url")
+    with connect(args.database_url) as conn:
+        if args.command == "apply":
+            versions = apply(conn)
+            print("\n".join(f"applied {v}" for v in versions) or "nothing to apply")
+        elif args.command == "status":
+            done = applied(conn)
+            for path in migration_files():
+                print(f"{path.stem}  {done[path.stem]:%Y-%m-%d %H:%M}" if path.stem in done else f"{path.stem}  pending")
+        else:
+            failures = check(conn)
+            for name, tables in failures.items():
+                print(f"FULL SCAN  {name}: {', '.join(tables)}")
+            print(f"{len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} hot queries use an index")
+            empty = empty_tables(conn)
+            if empty:
+                print(f"note: {', '.join(empty)} empty; plans on empty tables are not representative")
+            sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
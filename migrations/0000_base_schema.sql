@@ -0,0 +1,54 @@
+-- The app's base tables, as created in the Supabase project before these migrations.
+-- Every statement is "if not exists", so this is a no-op there; it lets the later
+-- migrations be applied to an empty (e.g. local) Postgres. local_backend.py mirrors it.
+create table if not exists users (
+    id bigint generated by default as identity primary key,
+    username text not null unique,
+    password text not null,
+    role text not null,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists settings (
+    key text primary key,
+    value text
+);
+
+create table if not exists vendors (
+    id bigint generated by default as identity primary key,
+    name text not null,
+    is_active boolean not null default true,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists expense_heads (
+    id bigint generated by default as identity primary key,
+    name text not null,
+    is_active boolean not null default true,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists shifts (
+    id bigint generated by default as identity primary key,
+    date date not null,
+    shift text not null,
+    opening_cash numeric not null default 0,
+    expected_closing numeric default 0,
+    actual_closing numeric default 0,
+    shortage numeric default 0,
+    status text not null default 'open',
+    created_at timestamptz not null default now()
+);
+
+create table if not exists transactions (
+    id bigint generated by default as identity primary key,
+    shift_id bigint references shifts (id),
+    type text not null,
+    amount numeric not null,
+    source text,
+    description text,
+    expense_head_id bigint references expense_heads (id),
+    vendor_id bigint references vendors (id),
+    payment_method text,
+    created_at timestamptz not null default now()
+);
@@ -0,0 +1,4 @@
+-- Idempotency key stamped on rows written through the offline journal (offline_queue.py).
+-- Replays upsert on this column with ON CONFLICT DO NOTHING, so it must be unique.
+alter table transactions add column if not exists idempotency_key text;
+create unique index if not exists transactions_idempotency_key_key on transactions (idempotency_key);
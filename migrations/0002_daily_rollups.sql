@@ -0,0 +1,13 @@
+-- Per-shift totals by transaction type and source, written by close_shift (rollups.py).
+-- source is '' for transactions without a source so it can be part of the key.
+create table if not exists daily_rollups (
+    shift_id bigint not null references shifts (id) on delete cascade,
+    date date not null,
+    shift text not null,
+    type text not null,
+    source text not null default '',
+    total numeric not null default 0,
+    txn_count integer not null default 0,
+    primary key (shift_id, type, source)
+);
+create index if not exists daily_rollups_date_idx on daily_rollups (date);
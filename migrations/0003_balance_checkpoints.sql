@@ -0,0 +1,8 @@
+-- Ledger balance at the start of each month (checkpoints.py).
+-- ledger is 'jaib', 'vendor:all' or 'vendor:<vendor id>'.
+create table if not exists balance_checkpoints (
+    ledger text not null,
+    month date not null,
+    balance numeric not null,
+    primary key (ledger, month)
+);
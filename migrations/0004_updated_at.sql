@@ -0,0 +1,27 @@
+-- Last change time of the tables the local read replica pulls (replica.py).
+-- A sync asks for rows with updated_at at or after its cursor, ordered by (updated_at, id).
+create or replace function set_updated_at() returns trigger language plpgsql as $$
+begin
+    new.updated_at = now();
+    return new;
+end
+$$;
+
+alter table shifts add column if not exists updated_at timestamptz not null default now();
+alter table transactions add column if not exists updated_at timestamptz not null default now();
+alter table vendors add column if not exists updated_at timestamptz not null default now();
+alter table expense_heads add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists shifts_set_updated_at on shifts;
+create trigger shifts_set_updated_at before update on shifts for each row execute function set_updated_at();
+drop trigger if exists transactions_set_updated_at on transactions;
+create trigger transactions_set_updated_at before update on transactions for each row execute function set_updated_at();
+drop trigger if exists vendors_set_updated_at on vendors;
+create trigger vendors_set_updated_at before update on vendors for each row execute function set_updated_at();
+drop trigger if exists expense_heads_set_updated_at on expense_heads;
+create trigger expense_heads_set_updated_at before update on expense_heads for each row execute function set_updated_at();
+
+create index if not exists shifts_updated_at_idx on shifts (updated_at, id);
+create index if not exists transactions_updated_at_idx on transactions (updated_at, id);
+create index if not exists vendors_updated_at_idx on vendors (updated_at, id);
+create index if not exists expense_heads_updated_at_idx on expense_heads (updated_at, id);
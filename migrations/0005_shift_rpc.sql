@@ -0,0 +1,73 @@
+-- Opening and closing shifts as one server-side call each (services.get_today_shift,
+-- load_recording_day and close_shift call these over RPC; local_backend.py mirrors them).
+
+-- At most one open shift per date and shift name, so devices opening the same shift at
+-- once get the same row. Creating the index fails while duplicates exist; find them with
+--   select date, shift, count(*) from shifts where status = 'open' group by 1, 2 having count(*) > 1;
+create unique index if not exists shifts_one_open_idx on shifts (date, shift) where status = 'open';
+
+-- The open shift of each name in p_shifts on p_date, creating the missing ones. A new
+-- shift opens with the actual closing of the previous closed shift: the same date's
+-- preceding shift, else the previous date's Night, else 0.
+create or replace function open_shifts(p_date date, p_shifts text[]) returns setof shifts
+language plpgsql as $$
+declare
+    shift_names constant text[] := array['Morning', 'Evening', 'Night'];
+    shift_name text;
+    idx integer;
+    opening numeric;
+begin
+    foreach shift_name in array p_shifts loop
+        continue when exists (select 1 from shifts s where s.date = p_date and s.shift = shift_name and s.status = 'open');
+        idx := array_position(shift_names, shift_name);
+        select s.actual_closing into opening from shifts s
+        where idx > 1 and s.date = p_date and s.shift = shift_names[idx - 1] and s.status = 'closed'
+        order by s.created_at limit 1;
+        if not found then
+            select s.actual_closing into opening from shifts s
+            where s.date = p_date - 1 and s.shift = 'Night' and s.status = 'closed'
+            order by s.created_at limit 1;
+        end if;
+        insert into shifts (date, shift, opening_cash, status)
+        values (p_date, shift_name, coalesce(opening, 0), 'open')
+        on conflict (date, shift) where status = 'open' do nothing;
+    end loop;
+    return query select * from shifts s where s.date = p_date and s.shift = any (p_shifts) and s.status = 'open'
+        order by array_position(p_shifts, s.shift);
+end
+$$;
+
+-- Close a shift: expected cash from its transactions (aggregation.expected_cash), the
+-- counted cash and shortage, and its daily_rollups rows, in one transaction. Returns the
+-- shift, unchanged if it was already closed, or no row if it does not exist.
+create or replace function close_shift(p_shift_id bigint, p_actual_cash numeric) returns setof shifts
+language plpgsql as $$
+declare
+    closing shifts;
+    expected numeric;
+begin
+    select * into closing from shifts where id = p_shift_id for update;
+    if not found then
+        return;
+    end if;
+    if closing.status = 'open' then
+        select closing.opening_cash + coalesce(sum(case
+                when t.type = 'sale' then t.amount
+                when t.type = 'return' then -t.amount
+                when t.type in ('expense', 'vendor_payment', 'purchase', 'withdrawal') and t.source = 'sales' then -t.amount
+                else 0
+            end), 0)
+        into expected from transactions t where t.shift_id = p_shift_id;
+        update shifts set expected_closing = expected, actual_closing = p_actual_cash,
+            shortage = p_actual_cash - expected, status = 'closed'
+        where id = p_shift_id
+        returning * into closing;
+        delete from daily_rollups where shift_id = p_shift_id;
+        insert into daily_rollups (shift_id, date, shift, type, source, total, txn_count)
+        select closing.id, closing.date, closing.shift, t.type, coalesce(t.source, ''), sum(t.amount), count(*)
+        from transactions t where t.shift_id = p_shift_id
+        group by t.type, coalesce(t.source, '');
+    end if;
+    return next closing;
+end
+$$;
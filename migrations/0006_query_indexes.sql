@@ -0,0 +1,22 @@
+-- Indexes for the filters and orderings the app actually sends (migrate.py's HOT_QUERIES
+-- lists them; `python migrate.py check` fails if any of them still needs a sequential scan).
+-- Report queries page on (created_at, id) (queries.stream_pages), so the range column is
+-- followed by id to serve the keyset order straight from the index.
+
+-- Shift close, the Shift Report and P&L: transactions of given shifts, in id order
+create index if not exists transactions_shift_id_idx on transactions (shift_id, id);
+-- Expense Report, withdrawals and the vendor ledger: one or a few types over a date range
+create index if not exists transactions_type_created_at_idx on transactions (type, created_at, id);
+-- Personal Ledger: the owner's own money over a date range
+create index if not exists transactions_source_created_at_idx on transactions (source, created_at, id)
+    where source is not null;
+-- Expense Report for one head, Vendor Report and opening balance for one vendor
+create index if not exists transactions_expense_head_created_at_idx on transactions (expense_head_id, created_at, id)
+    where expense_head_id is not null;
+create index if not exists transactions_vendor_created_at_idx on transactions (vendor_id, created_at, id)
+    where vendor_id is not null;
+
+-- Dashboard, Shift Report, rollup rebuilds and report_range_closed: shifts by date, name and status
+create index if not exists shifts_date_idx on shifts (date, shift, status);
+-- Dashboard: the last closed shift's actual closing
+create index if not exists shifts_closed_created_at_idx on shifts (created_at) where status = 'closed';
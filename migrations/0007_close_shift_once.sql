@@ -0,0 +1,32 @@
+-- close_shift (0005_shift_rpc.sql) returned an already closed shift unchanged, so a second
+-- device closing the same shift was told it succeeded while its counted cash was dropped.
+-- It now returns no row unless this call closed the shift (local_backend.py mirrors it).
+create or replace function close_shift(p_shift_id bigint, p_actual_cash numeric) returns setof shifts
+language plpgsql as $$
+declare
+    closing shifts;
+    expected numeric;
+begin
+    select * into closing from shifts where id = p_shift_id for update;
+    if not found or closing.status <> 'open' then
+        return;
+    end if;
+    select closing.opening_cash + coalesce(sum(case
+            when t.type = 'sale' then t.amount
+            when t.type = 'return' then -t.amount
+            when t.type in ('expense', 'vendor_payment', 'purchase', 'withdrawal') and t.source = 'sales' then -t.amount
+            else 0
+        end), 0)
+    into expected from transactions t where t.shift_id = p_shift_id;
+    update shifts set expected_closing = expected, actual_closing = p_actual_cash,
+        shortage = p_actual_cash - expected, status = 'closed'
+    where id = p_shift_id
+    returning * into closing;
+    delete from daily_rollups where shift_id = p_shift_id;
+    insert into daily_rollups (shift_id, date, shift, type, source, total, txn_count)
+    select closing.id, closing.date, closing.shift, t.type, coalesce(t.source, ''), sum(t.amount), count(*)
+    from transactions t where t.shift_id = p_shift_id
+    group by t.type, coalesce(t.source, '');
+    return next closing;
+end
+$$;
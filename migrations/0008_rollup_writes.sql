@@ -0,0 +1,42 @@
+-- Keeping daily_rollups (0002_daily_rollups.sql) current after a shift is closed
+-- (local_backend.py mirrors both).
+
+-- A transaction inserted into a closed shift (a late entry, or a queued offline op
+-- replayed after the close) is added to the shift's rollup in the same transaction.
+-- The shift row is locked in share mode, so an insert racing close_shift either is
+-- counted by the close or waits for it and is added here.
+create or replace function roll_up_late_transaction() returns trigger
+language plpgsql as $$
+declare
+    closed shifts;
+begin
+    select * into closed from shifts where id = new.shift_id for share;
+    if found and closed.status = 'closed' then
+        insert into daily_rollups (shift_id, date, shift, type, source, total, txn_count)
+        values (closed.id, closed.date, closed.shift, new.type, coalesce(new.source, ''), new.amount, 1)
+        on conflict (shift_id, type, source) do update
+            set total = daily_rollups.total + excluded.total, txn_count = daily_rollups.txn_count + 1;
+    end if;
+    return null;
+end
+$$;
+drop trigger if exists transactions_roll_up_late on transactions;
+create trigger transactions_roll_up_late after insert on transactions
+    for each row execute function roll_up_late_transaction();
+
+-- Recompute the rollups of the closed shifts among p_shift_ids from their transactions
+-- (rollups.rebuild_rollups). Delete and insert run in one transaction, so readers never
+-- see a shift without its rollup. Returns the ids of the shifts rebuilt.
+create or replace function rebuild_rollups(p_shift_ids bigint[]) returns setof bigint
+language plpgsql as $$
+begin
+    return query select s.id from shifts s where s.id = any (p_shift_ids) and s.status = 'closed' for share;
+    delete from daily_rollups r using shifts s
+    where r.shift_id = s.id and s.id = any (p_shift_ids) and s.status = 'closed';
+    insert into daily_rollups (shift_id, date, shift, type, source, total, txn_count)
+    select s.id, s.date, s.shift, t.type, coalesce(t.source, ''), sum(t.amount), count(*)
+    from shifts s join transactions t on t.shift_id = s.id
+    where s.id = any (p_shift_ids) and s.status = 'closed'
+    group by s.id, s.date, s.shift, t.type, coalesce(t.source, '');
+end
+$$;
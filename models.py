@@ -0,0 +1,57 @@
+"""Typed records of the shift and transaction rows the reports read.
+
+PostgREST returns each row as a dict, which carries its own hash table of
+keys. The report builders and balance scans read a few fixed columns from
+thousands of rows, so they select only those columns and turn each page
+into Shift or Transaction records (queries.stream_records):
+NamedTuples, whose values sit in one fixed-size tuple with no per-row
+__dict__. A column the query did not select gets the field's default, and
+an embedded name (``expense_heads(name)``, ``vendors(name)``) becomes
+``expense_head`` / ``vendor``, None when the row has no such link.
+"""
+from typing import NamedTuple, Optional
+
+
+class Shift(NamedTuple):
+    id: int
+    date: str
+    shift: str
+    status: str = "open"
+    opening_cash: float = 0.0
+    expected_closing: float = 0.0
+    actual_closing: float = 0.0
+    shortage: float = 0.0
+    created_at: str = ""
+
+    @classmethod
+    def from_rows(cls, rows):
+        defaults = [(name, cls._field_defaults.get(name)) for name in cls._fields]
+        return [cls._make([row.get(name, default) for name, default in defaults]) for row in rows]
+
+
+class Transaction(NamedTuple):
+    id: int
+    created_at: str
+    type: str
+    amount: float
+    source: Optional[str] = None
+    description: Optional[str] = ""
+    shift_id: Optional[int] = None
+    expense_head_id: Optional[int] = None
+    vendor_id: Optional[int] = None
+    expense_head: Optional[str] = None
+    vendor: Optional[str] = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        defaults = [(name, cls._field_defaults.get(name)) for name in cls._fields[:-2]]
+        records = []
+        for row in rows:
+            head, vendor = row.get("expense_heads"), row.get("vendors")
+            records.append(cls._make([
+                *(row.get(name, default) for name, default in defaults),
+                head["name"] if head else None,
+                vendor["name"] if vendor else None,
+            ]))
+        return records
+
@@ -0,0 +1,281 @@
+"""Durable offline write queue.
+
+Writes that cannot reach Supabase are appended to a local SQLite journal
+(WAL mode) that is shared by every session of the server process and
+survives restarts. Each op carries an idempotency key; rows of tables in
+IDEMPOTENT_TABLES store it in their ``idempotency_key`` column (unique, see
+migrations/0001_transactions_idempotency_key.sql) and are replayed with
+``ON CONFLICT DO NOTHING``, so replaying an op whose first attempt actually
+reached the server never creates a duplicate.
+
+A failed replay is classified by failure_kind(). While the server cannot be
+reached, ops stay queued in order and flushing pauses. An op the server
+rejects for good (constraint, schema, bad request) is moved to the dead
+letters instead of blocking every op queued behind it, as is an op that
+keeps failing with a server error after MAX_ATTEMPTS tries; the app lists
+dead letters so they can be retried or discarded by hand.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import httpx
+
+DEFAULT_JOURNAL_PATH = os.environ.get("OFFLINE_JOURNAL_PATH", "offline_journal.db")
+IDEMPOTENT_TABLES = {"transactions"}
+UPSERT_KEYS = {"settings": "key"}  # conflict column per table, "id" otherwise
+RETRY_AFTER = 10  # seconds to wait after a failed flush before trying again
+MAX_ATTEMPTS = 5  # server errors an op may get before it is dead-lettered
+# SQLSTATE classes / PostgREST codes of errors that may pass on a retry:
+# connection, transaction rollback (serialization, deadlock), resources, cancelled (timeouts)
+TRANSIENT_SQLSTATES = ("08", "40", "53", "57", "55P03", "PGRST000", "PGRST001", "PGRST002", "PGRST003")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_ops (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_key TEXT NOT NULL UNIQUE,
+    table_name TEXT NOT NULL,
+    method TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    dead_at REAL
+)
+"""
+
+
+def _rows(data):
+    return data if isinstance(data, list) else [data]
+
+
+def failure_kind(error):
+    """"offline" if the request got no answer, "transient" if a retry may pass, else "permanent"."""
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return "offline"
+    if isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error)):
+        return "transient"
+    # postgrest's APIError: a SQLSTATE / PGRST code, or the HTTP status of a non-JSON reply
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return "transient" if code >= 500 or code in (408, 429) else "permanent"
+    if isinstance(code, str) and code.startswith(TRANSIENT_SQLSTATES):
+        return "transient"
+    return "permanent"
+
+
+def stamp_idempotency_keys(table, data, op_key=None):
+    """Give every row of an idempotent table an idempotency_key (kept if already set)."""
+    op_key = op_key or uuid.uuid4().hex
+    if table in IDEMPOTENT_TABLES:
+        rows = _rows(data)
+        for i, row in enumerate(rows):
+            row.setdefault("idempotency_key", op_key if len(rows) == 1 else f"{op_key}:{i}")
+    return op_key
+
+
+class OfflineJournal:
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._flush_lock = threading.Lock()
+        self._empty_lock = threading.Lock()
+        self._retry_at = 0.0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            # Journals created before dead letters existed
+            if "dead_at" not in {row[1] for row in conn.execute("PRAGMA table_info(pending_ops)")}:
+                conn.execute("ALTER TABLE pending_ops ADD COLUMN dead_at REAL")
+        # The server process owns the journal, so an empty one can be skipped without reading it
+        self._empty = self.count() == 0
+        self._dead = self.dead_count()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def enqueue(self, table, data, method="insert"):
+        """Append an op to the journal and return its idempotency key.
+
+        ``data`` is a row dict or, for a batch that must be replayed as one
+        unit, a list of row dicts.
+        """
+        op_key = uuid.uuid4().hex
+        if method in ("insert", "upsert"):
+            stamp_idempotency_keys(table, data, op_key)
+        with self._empty_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO pending_ops (op_key, table_name, method, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (op_key, table, method, json.dumps(data, default=str), time.time()),
+            )
+            self._empty = False
+        # New work arrived; let the next flush try immediately.
+        self._retry_at = 0.0
+        return op_key
+
+    def pending(self):
+        if self._empty:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute("SELECT seq, op_key, table_name, method, payload FROM pending_ops WHERE dead_at IS NULL ORDER BY seq").fetchall()
+        return [
+            {"seq": seq, "op_key": op_key, "table": table, "method": method, "data": json.loads(payload)}
+            for seq, op_key, table, method, payload in rows
+        ]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pending_ops WHERE dead_at IS NULL").fetchone()[0]
+
+    def dead_count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pending_ops WHERE dead_at IS NOT NULL").fetchone()[0]
+
+    def dead_letters(self):
+        """Ops that will not be replayed until retry_dead(), oldest first, with their last error."""
+        if not self._dead:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT op_key, table_name, method, payload, attempts, last_error, dead_at FROM pending_ops WHERE dead_at IS NOT NULL ORDER BY seq"
+            ).fetchall()
+        return [
+            {"op_key": op_key, "table": table, "method": method, "data": json.loads(payload),
+             "attempts": attempts, "error": error, "dead_at": dead_at}
+            for op_key, table, method, payload, attempts, error, dead_at in rows
+        ]
+
+    def retry_dead(self, op_key):
+        """Queue a dead letter for replay again, in its original place."""
+        with self._empty_lock, self._connect() as conn:
+            conn.execute("UPDATE pending_ops SET dead_at = NULL, attempts = 0 WHERE op_key = ?", (op_key,))
+            self._empty = False
+        self._dead = self.dead_count()
+        self._retry_at = 0.0
+
+    def discard(self, op_key):
+        """Drop a dead letter for good."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pending_ops WHERE op_key = ? AND dead_at IS NOT NULL", (op_key,))
+        self._dead = self.dead_count()
+
+    def _failed(self, ops, error, kind):
+        """Record a failed attempt at the ops; returns True if they were all dead-lettered.
+
+        Offline failures do not count as attempts: the server never saw the op.
+        """
+        seqs = [op["seq"] for op in ops]
+        marks = ",".join("?" * len(seqs))
+        with self._connect() as conn:
+            if kind != "offline":
+                conn.execute(f"UPDATE pending_ops SET attempts = attempts + 1 WHERE seq IN ({marks})", seqs)
+            conn.execute(f"UPDATE pending_ops SET last_error = ? WHERE seq IN ({marks})", [str(error)] + seqs)
+            if kind != "offline":
+                conn.execute(
+                    f"UPDATE pending_ops SET dead_at = ? WHERE seq IN ({marks}) AND (? OR attempts >= ?)",
+                    [time.time()] + seqs + [kind == "permanent", MAX_ATTEMPTS],
+                )
+            alive = conn.execute(f"SELECT COUNT(*) FROM pending_ops WHERE seq IN ({marks}) AND dead_at IS NULL", seqs).fetchone()[0]
+        self._dead = self.dead_count()
+        return alive == 0
+
+    def _sent(self, batch):
+        seqs = [op["seq"] for op in batch["ops"]]
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM pending_ops WHERE seq IN ({','.join('?' * len(seqs))})", seqs)
+
+    def _batches(self, ops):
+        """Group consecutive inserts/upserts with the same table and columns into one request each."""
+        batch = None
+        for op in ops:
+            if op["method"] in ("insert", "upsert"):
+                rows = _rows(op["data"])
+                signature = (op["table"], op["method"], tuple(sorted(rows[0])) if rows else ())
+                if batch and batch["signature"] == signature and all(tuple(sorted(r)) == signature[2] for r in rows):
+                    batch["ops"].append(op)
+                    batch["rows"].extend(rows)
+                    continue
+                if batch:
+                    yield batch
+                batch = {"signature": signature, "table": op["table"], "method": op["method"], "ops": [op], "rows": list(rows)}
+            else:
+                if batch:
+                    yield batch
+                    batch = None
+                yield {"signature": None, "table": op["table"], "method": op["method"], "ops": [op], "rows": _rows(op["data"])}
+        if batch:
+            yield batch
+
+    def _send(self, client, batch):
+        table, method, rows = batch["table"], batch["method"], batch["rows"]
+        if not rows:
+            return
+        if method in ("insert", "upsert") and table in IDEMPOTENT_TABLES:
+            client.table(table).upsert(rows, on_conflict="idempotency_key", ignore_duplicates=True).execute()
+        elif method == "insert":
+            client.table(table).insert(rows).execute()
+        elif method == "upsert":
+            key = UPSERT_KEYS.get(table, "id")
+            latest = {}
+            for row in rows:
+                latest[row.get(key, id(row))] = row
+            client.table(table).upsert(list(latest.values())).execute()
+        elif method == "update":
+            client.table(table).update(rows[0]).eq("id", rows[0]["id"]).execute()
+        elif method == "delete":
+            client.table(table).delete().eq("id", rows[0]["id"]).execute()
+
+    def _replay(self, client, batch, flushed):
+        """Send a batch; returns (error or None, True if replaying has to stop at it)."""
+        try:
+            self._send(client, batch)
+        except Exception as e:
+            kind = failure_kind(e)
+            if kind != "permanent" or len(batch["ops"]) == 1:
+                return e, not self._failed(batch["ops"], e, kind)
+            # Find the ops at fault by sending the batch's ops one at a time
+            error = e
+            for op in batch["ops"]:
+                op_error, stop = self._replay(client, {**batch, "ops": [op], "rows": _rows(op["data"])}, flushed)
+                error = op_error or error
+                if stop:
+                    return error, True
+            return error, False
+        self._sent(batch)
+        flushed.setdefault(batch["table"], []).extend(batch["rows"])
+        return None, False
+
+    def flush(self, client):
+        """Replay pending ops in order.
+
+        Returns (flushed, remaining_count, error) where flushed maps each
+        table to the rows written to it and error is the last failure. A
+        batch the server rejects is retried op by op, so only the ops at
+        fault are dead-lettered and the others still go through. Replaying
+        stops at an op that failed offline, or with a server error it has
+        had fewer than MAX_ATTEMPTS times; it is tried first next time. Only
+        one session flushes at a time, and after a stop flushing pauses for
+        RETRY_AFTER seconds so offline reruns do not each wait on the network.
+        """
+        if self._empty:
+            return {}, 0, None
+        if time.monotonic() < self._retry_at or not self._flush_lock.acquire(blocking=False):
+            return {}, self.count(), None
+        flushed, error = {}, None
+        try:
+            for batch in self._batches(self.pending()):
+                batch_error, stop = self._replay(client, batch, flushed)
+                error = batch_error or error
+                if stop:
+                    self._retry_at = time.monotonic() + RETRY_AFTER
+                    break
+        finally:
+            self._flush_lock.release()
+        with self._empty_lock:
+            remaining = self.count()
+            self._empty = remaining == 0
+        return flushed, remaining, error
@@ -0,0 +1,81 @@
+"""Query helpers shared by the pages and the report/rollup modules."""
+from itertools import chain, islice
+
+from concurrency import gather, prefetch
+
+PAGE_SIZE = 1000  # PostgREST's default max-rows cap
+ID_CHUNK = 100  # keeps in_() filters well inside URL length limits
+PREFETCH_PAGES = 2  # how far a prefetched query may run ahead of its reader
+
+
+def chunks(items, size=ID_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def stream_pages(make_query, page_size=PAGE_SIZE, key="created_at"):
+    """Yield the rows of make_query() in (key, id) order as lists, one keyset page each.
+
+    make_query must return a fresh query builder on every call (builders are
+    mutated by their filter methods) and select both key and id.
+    Unlike a single execute(), this never stops at the server's row cap, and
+    only one page is held in memory at a time.
+    """
+    last = None
+    while True:
+        query = make_query()
+        if last:
+            value, row_id = last[key], last["id"]
+            query = query.or_(f'{key}.gt."{value}",and({key}.eq."{value}",id.gt.{row_id})')
+        rows = query.order(key).order("id").limit(page_size).execute().data
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+
+def stream_rows(make_query, page_size=PAGE_SIZE):
+    """Yield the rows of make_query() one at a time, paging as stream_pages() does."""
+    return chain.from_iterable(stream_pages(make_query, page_size))
+
+
+def stream_records(make_query, model, page_size=PAGE_SIZE):
+    """stream_rows(make_query) as model records (see models.py), converted a page at a time."""
+    return chain.from_iterable(map(model.from_rows, stream_pages(make_query, page_size)))
+
+
+def prefetch_records(make_query, model):
+    """stream_records(make_query, model), with the pages fetched and converted in a background thread.
+
+    Whole pages are handed over, so the reader does not pay for a thread
+    switch per record.
+    """
+    return chain.from_iterable(prefetch(map(model.from_rows, stream_pages(make_query)), buffer=PREFETCH_PAGES))
+
+
+def transactions_for_shifts(client, shift_ids, columns="*"):
+    """Fetch the transactions of many shifts with chunked in_() queries, paging past the row cap.
+
+    The chunks are fetched concurrently.
+    """
+    ids = [i for i in shift_ids if i]
+
+    def fetch(chunk):
+        rows = []
+        offset = 0
+        while True:
+            page_rows = client.table("transactions").select(columns).in_("shift_id", chunk).order("id").range(offset, offset + PAGE_SIZE - 1).execute().data
+            rows.extend(page_rows)
+            if len(page_rows) < PAGE_SIZE:
+                return rows
+            offset += PAGE_SIZE
+    if len(ids) <= ID_CHUNK:
+        return fetch(ids) if ids else []
+    return [t for rows in gather(*(lambda chunk=chunk: fetch(chunk) for chunk in chunks(ids))) for t in rows]
@@ -0,0 +1,147 @@
+"""Local read replica of the shop's data for the reports.
+
+The shop's data is small and changes almost only by appending, so the
+reports do not need to go over the network for every row. Replica keeps a
+SQLite copy of shifts, transactions, vendors and expense_heads (file:
+REPLICA_PATH, default replica.db) in local_backend's schema, and reports
+query it through a LocalClient exactly as they query Supabase. Derived
+tables (daily_rollups, balance_checkpoints) are built locally in the
+replica: sync() rebuilds the rollups of the shifts it pulled (or
+pulled transactions for), and the reports write their own checkpoints, for
+the months the replica already holds every transaction of (synced_through).
+
+sync() pulls, per table, the rows whose updated_at is at or after the
+table's stored cursor, in (updated_at, id) keyset pages, and upserts them
+(migrations/0004_updated_at.sql keeps updated_at current on the server).
+Rows committed late with an older updated_at are caught by re-reading the
+last SYNC_OVERLAP seconds each time. Vendors and expense heads can also be
+deleted, so their id lists are compared on every sync. The tables are
+pulled concurrently (concurrency.gather).
+
+Once a first sync has completed, the replica stays usable when the
+connection drops: sync() fails and the reports read what was last pulled.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from concurrency import gather, submit
+from local_backend import LocalClient
+from queries import chunks, stream_pages
+from rollups import rebuild_rollups
+
+DEFAULT_REPLICA_PATH = os.environ.get("REPLICA_PATH", "replica.db")
+TABLES = ["shifts", "transactions", "vendors", "expense_heads"]
+DELETABLE_TABLES = {"vendors", "expense_heads"}
+SYNC_OVERLAP = 60  # seconds of already pulled changes to re-read, for late commits
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    table_name TEXT PRIMARY KEY,
+    updated_at TEXT,
+    synced_at REAL NOT NULL
+)
+"""
+
+
+def _rewind(timestamp, seconds):
+    return (datetime.fromisoformat(timestamp) - timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+
+
+class Replica:
+    def __init__(self, path=DEFAULT_REPLICA_PATH):
+        self.client = LocalClient(path, latency_ms=0)
+        self._sync_lock = threading.Lock()
+        self._background = None
+        self.written_at = 0.0  # last write this process made to the source (see mark_written)
+        with self.client.lock:
+            self.client.conn.execute(SCHEMA)
+            self.client.conn.commit()
+        self._columns = {table: self._table_columns(table) for table in TABLES}
+
+    def _table_columns(self, table):
+        with self.client.lock:
+            return {row[1] for row in self.client.conn.execute(f'PRAGMA table_info("{table}")')}
+
+    def _cursors(self):
+        with self.client.lock:
+            return {name: (updated_at, synced_at) for name, updated_at, synced_at in self.client.conn.execute("SELECT table_name, updated_at, synced_at FROM sync_cursors")}
+
+    def synced_at(self):
+        """Time of the last sync that completed for every table, or None before the first."""
+        cursors = self._cursors()
+        if any(table not in cursors for table in TABLES):
+            return None
+        return min(synced_at for _, synced_at in cursors.values())
+
+    def synced_through(self):
+        """ISO time before which the replica holds every transaction the source had.
+
+        That is the transactions cursor less SYNC_OVERLAP, as rows committed
+        late with an older updated_at may still be pulled; "" before any was.
+        """
+        cursor = self._cursors().get("transactions", (None, None))[0]
+        return _rewind(cursor, SYNC_OVERLAP) if cursor else ""
+
+    def mark_written(self):
+        """Note a write to the source, so the next needs_sync() is True."""
+        self.written_at = time.time()
+
+    def needs_sync(self, max_age):
+        synced_at = self.synced_at()
+        return synced_at is None or self.written_at >= synced_at or time.time() - synced_at > max_age
+
+    def sync(self, source):
+        """Pull the rows changed on source since the last sync. Returns {table: rows pulled}.
+
+        Concurrent calls wait for the sync under way and then run their own,
+        which only finds what changed in between.
+        """
+        with self._sync_lock:
+            cursors = self._cursors()
+            pulled = gather(*(lambda table=table: self._pull(source, table, cursors.get(table, (None, None))[0]) for table in TABLES))
+            # Rollups only cover closed shifts; rebuild_rollups skips the others
+            rebuild_rollups(self.client, shift_ids={i for _, shift_ids in pulled for i in shift_ids})
+            return {table: count for table, (count, _) in zip(TABLES, pulled)}
+
+    def sync_in_background(self, source):
+        """Start a sync on the read pool unless one started this way is still running."""
+        if self._background is None or self._background.done():
+            self._background = submit(lambda: self.sync(source))
+        return self._background
+
+    def _pull(self, source, table, cursor):
+        since = _rewind(cursor, SYNC_OVERLAP) if cursor else None
+
+        def changed():
+            query = source.table(table).select("*")
+            return query.gte("updated_at", since) if since else query
+
+        count, shift_ids = 0, set()
+        shift_key = {"shifts": "id", "transactions": "shift_id"}.get(table)
+        for page in stream_pages(changed, key="updated_at"):
+            columns = self._columns[table]
+            self.client.table(table).upsert([{k: v for k, v in row.items() if k in columns} for row in page]).execute()
+            cursor = page[-1]["updated_at"]  # pages come in updated_at order
+            count += len(page)
+            if shift_key:
+                shift_ids.update(row[shift_key] for row in page)
+        if table in DELETABLE_TABLES:
+            self._drop_deleted(source, table)
+        with self.client.lock:
+            self.client.conn.execute(
+                "INSERT INTO sync_cursors (table_name, updated_at, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET updated_at = excluded.updated_at, synced_at = excluded.synced_at",
+                (table, cursor, time.time()),
+            )
+            self.client.conn.commit()
+        return count, shift_ids
+
+    def _drop_deleted(self, source, table):
+        live = {row["id"] for row in source.table(table).select("id").execute().data}
+        with self.client.lock:
+            local = [row_id for (row_id,) in self.client.conn.execute(f'SELECT id FROM "{table}"')]
+        gone = [row_id for row_id in local if row_id not in live]
+        for chunk in chunks(gone):
+            self.client.table(table).delete().in_("id", chunk).execute()
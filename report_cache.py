@@ -0,0 +1,116 @@
+"""On-disk cache of generated reports over closed date ranges.
+
+Once every shift in a range is closed (and the range ends before today),
+a report over it no longer changes, so its table rows and rendered CSV/PDF
+are stored in a local SQLite file keyed by report type, date range and
+filters, e.g. ``shift|2024-01-01..2024-03-31|All``. Writes that touch a
+date (late edits, queued offline ops being replayed) invalidate every entry
+whose range covers it. The CSV/PDF files are copied in and out of their
+blobs a chunk at a time, so a large report is never held in memory whole.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("REPORT_CACHE_PATH", "report_cache.db")
+MAX_AGE = 30 * 24 * 3600  # entries unused for this long are dropped
+CHUNK = 1024 * 1024  # bytes copied at a time between files and blobs
+SPOOL_SIZE = 4 * 1024 * 1024  # bytes of a cached file kept in memory before it spills to disk
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    key TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    csv BLOB,
+    pdf BLOB,
+    used_at REAL NOT NULL
+)
+"""
+
+
+def cache_key(report, start_date, end_date, filters):
+    return f"{report}|{start_date.isoformat()}..{end_date.isoformat()}|{filters}"
+
+
+def _size(file):
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+class ReportCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS reports_range_idx ON reports (start_date, end_date)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, report, start_date, end_date, filters):
+        """{"rows", "csv", "pdf"} for a cached report, or None. csv/pdf are spooled files (None if not stored)."""
+        key = cache_key(report, start_date, end_date, filters)
+        with self._connect() as conn:
+            found = conn.execute("SELECT rowid, rows, csv IS NOT NULL, pdf IS NOT NULL FROM reports WHERE key = ?", (key,)).fetchone()
+            if found is None:
+                return None
+            conn.execute("UPDATE reports SET used_at = ? WHERE key = ?", (time.time(), key))
+            rowid, rows, has_csv, has_pdf = found
+            return {
+                "rows": json.loads(rows),
+                "csv": self._read_blob(conn, "csv", rowid) if has_csv else None,
+                "pdf": self._read_blob(conn, "pdf", rowid) if has_pdf else None,
+            }
+
+    def put(self, report, start_date, end_date, filters, rows=None, csv_file=None, pdf_file=None):
+        """Store a report; csv_file/pdf_file are file objects, rewound afterwards for further use."""
+        now = time.time()
+        files = {"csv": csv_file, "pdf": pdf_file}
+        # Blobs of the files' sizes, filled in below
+        blobs = ", ".join("NULL" if file is None else "zeroblob(?)" for file in files.values())
+        sizes = [_size(file) for file in files.values() if file is not None]
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                f"INSERT OR REPLACE INTO reports (key, report, start_date, end_date, rows, csv, pdf, used_at) VALUES (?, ?, ?, ?, ?, {blobs}, ?)",
+                (cache_key(report, start_date, end_date, filters), report, start_date.isoformat(), end_date.isoformat(),
+                 json.dumps(rows, default=str), *sizes, now),
+            )
+            rowid = cursor.lastrowid
+            for column, file in files.items():
+                if file is not None:
+                    with conn.blobopen("reports", column, rowid) as blob:
+                        while chunk := file.read(CHUNK):
+                            blob.write(chunk)
+                    file.seek(0)
+            conn.execute("DELETE FROM reports WHERE used_at < ?", (now - MAX_AGE,))
+
+    def _read_blob(self, conn, column, rowid):
+        out = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        with conn.blobopen("reports", column, rowid, readonly=True) as blob:
+            while chunk := blob.read(CHUNK):
+                out.write(chunk)
+        out.seek(0)
+        return out
+
+    def invalidate_dates(self, dates):
+        """Drop every entry whose range covers one of the dates."""
+        days = sorted({d.isoformat() for d in dates if d})
+        if not days:
+            return
+        with self._lock, self._connect() as conn:
+            for day in days:
+                conn.execute("DELETE FROM reports WHERE start_date <= ? AND end_date >= ?", (day, day))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM reports")
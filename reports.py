@@ -0,0 +1,168 @@
+"""Report builders.
+
+Each builder streams its source rows page by page as typed records
+(queries.stream_records, models.py) selecting only the columns it prints,
+and yields the formatted report rows one at a time, so raw result dicts are
+never held for the whole range.
+"""
+import heapq
+from datetime import timedelta
+
+from aggregation import cash_measures, empty_measures
+from checkpoints import opening_balance, vendor_delta, vendor_ledger
+from concurrency import prefetch
+from models import Shift, Transaction
+from queries import ID_CHUNK, batched, prefetch_records, stream_records, transactions_for_shifts
+
+SHIFT_REPORT_COLUMNS = ["Date", "Shift", "Sales", "Expenses", "Vendor Pmts", "Withdrawals", "Shortage", "Expected", "Actual"]
+EXPENSE_REPORT_COLUMNS = ["Date", "Expense Head", "Description", "Amount"]
+VENDOR_REPORT_COLUMNS = ["Date", "Type", "Description", "Amount", "Balance"]
+PERSONAL_LEDGER_COLUMNS = ["Date", "Description", "Invest", "Withdraw", "Balance"]
+
+# What each report selects; id and created_at are the keyset stream_pages() pages on
+SHIFT_SELECT = "id, date, shift, shortage, expected_closing, actual_closing, created_at"
+EXPENSE_SELECT = "id, created_at, description, amount, expense_heads(name)"
+VENDOR_SELECT = "id, created_at, type, source, description, amount"
+JAIB_SELECT = "id, created_at, type, source, description, amount, expense_heads(name), vendors(name)"
+WITHDRAWAL_SELECT = "id, created_at, type, description, amount"
+
+
+def _range(start_date, end_date):
+    # created_at is a timestamp, so the end date is inclusive up to the next midnight
+    return start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
+
+
+def shift_report(client, start_date, end_date, shift_filter="All"):
+    """Rows of the Shift Report, followed by the GRAND TOTAL row (nothing if there are no shifts)."""
+    def shifts_query():
+        query = client.table("shifts").select(SHIFT_SELECT).gte("date", start_date.isoformat()).lte("date", end_date.isoformat())
+        if shift_filter != "All":
+            query = query.eq("shift", shift_filter)
+        return query
+
+    total_sales = total_expenses = total_vendor_payments = total_withdrawals = total_shortage = 0.0
+    found = False
+    empty = empty_measures()
+    # The next batch's shifts and transactions are fetched while this one is totalled
+    batches = prefetch(((shifts, transactions_for_shifts(client, [s.id for s in shifts], "shift_id, type, source, amount"))
+                        for shifts in batched(stream_records(shifts_query, Shift), ID_CHUNK)))
+    for shifts, txns in batches:
+        found = True
+        per_shift = cash_measures(txns, by="shift_id")
+        for s in shifts:
+            sums = per_shift.get(s.id, empty)
+            sales = sums["sales"]
+            expenses = sums["expenses"]
+            vendor_payments = sums["vendor_payments"]
+            withdrawals = sums["withdrawals"]
+            shortage = s.shortage
+            expected = s.expected_closing
+            actual = s.actual_closing
+            yield [
+                s.date, s.shift,
+                f"{sales:.2f}", f"{expenses:.2f}", f"{vendor_payments:.2f}",
+                f"{withdrawals:.2f}", f"{shortage:.2f}",
+                f"{expected:.2f}", f"{actual:.2f}"
+            ]
+            total_sales += sales
+            total_expenses += expenses
+            total_vendor_payments += vendor_payments
+            total_withdrawals += withdrawals
+            total_shortage += shortage
+    if found:
+        yield [
+            "GRAND TOTAL", "", f"{total_sales:.2f}", f"{total_expenses:.2f}",
+            f"{total_vendor_payments:.2f}", f"{total_withdrawals:.2f}",
+            f"{total_shortage:.2f}", "", ""
+        ]
+
+
+def expense_report(client, start_date, end_date, head_id=0):
+    start, end = _range(start_date, end_date)
+
+    def query():
+        q = client.table("transactions").select(EXPENSE_SELECT).eq("type", "expense").gte("created_at", start).lte("created_at", end)
+        if head_id != 0:
+            q = q.eq("expense_head_id", head_id)
+        return q
+
+    for t in stream_records(query, Transaction):
+        yield [
+            t.created_at[:10],
+            t.expense_head if t.expense_head is not None else "Unknown",
+            t.description,
+            f"{t.amount:.2f}"
+        ]
+
+
+def vendor_report(client, start_date, end_date, vendor_id=0, synced_through=None):
+    """Vendor transactions with a running balance of what is owed on credit.
+
+    The balance starts from what was owed before start_date (see checkpoints.py;
+    synced_through as for opening_balance).
+    """
+    start, end = _range(start_date, end_date)
+
+    def query():
+        q = client.table("transactions").select(VENDOR_SELECT).in_("type", ["purchase", "vendor_payment", "return"]).gte("created_at", start).lte("created_at", end)
+        if vendor_id != 0:
+            q = q.eq("vendor_id", vendor_id)
+        return q
+
+    # The rows are fetched in the background while the opening balance is worked out
+    rows = prefetch_records(query, Transaction)
+    balance = opening_balance(client, vendor_ledger(vendor_id), start_date, synced_through)
+    if balance:
+        yield [start_date.isoformat(), "Opening Balance", "", "", f"{balance:.2f}"]
+    for t in rows:
+        balance += vendor_delta(t)
+        yield [
+            t.created_at[:10],
+            t.type.replace("_", " ").title(),
+            t.description,
+            f"{t.amount:.2f}",
+            f"{balance:.2f}"
+        ]
+
+
+def personal_ledger(client, start_date, end_date, synced_through=None):
+    """Money put in from the owner's pocket ("jaib") against withdrawals, with a running balance.
+
+    The balance starts from the ledger's balance before start_date (see checkpoints.py;
+    synced_through as for opening_balance).
+    """
+    start, end = _range(start_date, end_date)
+    # Both streams are fetched in the background while the opening balance is worked out
+    jaib = prefetch_records(lambda: client.table("transactions").select(JAIB_SELECT).eq("source", "jaib").gte("created_at", start).lte("created_at", end), Transaction)
+    withdrawals = prefetch_records(lambda: client.table("transactions").select(WITHDRAWAL_SELECT).eq("type", "withdrawal").gte("created_at", start).lte("created_at", end), Transaction)
+    balance = opening_balance(client, "jaib", start_date, synced_through)
+    if balance:
+        yield [start_date.isoformat(), "Opening Balance", "", "", f"{balance:.2f}"]
+    for t in heapq.merge(jaib, withdrawals, key=lambda x: x.created_at):
+        if t.type == "withdrawal":
+            invest = 0
+            withdraw = t.amount
+            desc = f"Withdrawal: {t.description}"
+            balance -= withdraw
+        else:
+            invest = t.amount
+            withdraw = 0
+            if t.type == "expense":
+                head_name = t.expense_head if t.expense_head is not None else "Unknown"
+                desc = f"Expense ({head_name}): {t.description}"
+            elif t.type == "vendor_payment":
+                vendor_name = t.vendor if t.vendor is not None else "Unknown"
+                desc = f"Vendor Payment ({vendor_name}): {t.description}"
+            elif t.type == "purchase":
+                vendor_name = t.vendor if t.vendor is not None else "Unknown"
+                desc = f"Purchase ({vendor_name}): {t.description}"
+            else:
+                desc = t.description
+            balance += invest
+        yield [
+            t.created_at[:10],
+            desc,
+            f"{invest:.2f}" if invest else "",
+            f"{withdraw:.2f}" if withdraw else "",
+            f"{balance:.2f}"
+        ]
@@ -0,0 +1,71 @@
+"""Per-shift totals by transaction type and source (the ``daily_rollups`` table).
+
+A shift's rollup is written by the close_shift function when the shift is
+closed (migrations/0005_shift_rpc.sql), transactions inserted into the shift
+after that (late entries, queued ops replayed) are added to it by a trigger,
+and it can be rebuilt from raw transactions at any time (rebuild_rollups;
+both in migrations/0008_rollup_writes.sql). Period views (Dashboard, Profit & Loss) read closed
+shifts from the rollup and only scan raw transactions for shifts that are
+still open or have not been rolled up yet. Rollup rows carry the same
+``type``/``source``/``amount`` keys as transactions, so the same sums apply
+to both. Schema: migrations/0002_daily_rollups.sql.
+"""
+from queries import chunks, stream_rows, transactions_for_shifts
+
+TXN_COLUMNS = "shift_id, type, source, amount"
+
+
+def summarize_shift(shift, txns):
+    groups = {}
+    for t in txns:
+        key = (t["type"], t.get("source") or "")
+        total, count = groups.get(key, (0.0, 0))
+        groups[key] = (total + t["amount"], count + 1)
+    return [
+        {
+            "shift_id": shift["id"], "date": shift["date"], "shift": shift["shift"],
+            "type": type_, "source": source, "total": total, "txn_count": count,
+        }
+        for (type_, source), (total, count) in groups.items()
+    ]
+
+
+def rebuild_rollups(client, shift_ids=None, start_date=None, end_date=None):
+    """Recompute the rollups of closed shifts, by id or by date range. Returns the number of shifts rebuilt.
+
+    Each chunk of shifts is rebuilt by one call of the rebuild_rollups
+    function, which replaces their rollup rows in a single transaction.
+    """
+    def closed_shifts():
+        query = client.table("shifts").select("id, created_at").eq("status", "closed")
+        if start_date:
+            query = query.gte("date", start_date.isoformat())
+        if end_date:
+            query = query.lte("date", end_date.isoformat())
+        return query
+
+    if shift_ids is not None:
+        ids = sorted({i for i in shift_ids if i})
+    else:
+        ids = [s["id"] for s in stream_rows(closed_shifts)]
+    rebuilt = 0
+    for chunk in chunks(ids):
+        rebuilt += len(client.rpc("rebuild_rollups", {"p_shift_ids": chunk}).execute().data)
+    return rebuilt
+
+
+def period_rows(client, shifts):
+    """type/source/amount rows covering the given shifts (each with ``id`` and ``status``).
+
+    Closed shifts come from the rollup; open shifts, and closed shifts without
+    rollup rows, are read from raw transactions.
+    """
+    closed_ids = [s["id"] for s in shifts if s["status"] == "closed"]
+    rows, rolled_up = [], set()
+    for chunk in chunks(closed_ids):
+        for r in client.table("daily_rollups").select("shift_id, type, source, total").in_("shift_id", chunk).execute().data:
+            rows.append({"type": r["type"], "source": r["source"] or None, "amount": r["total"]})
+            rolled_up.add(r["shift_id"])
+    raw_ids = [s["id"] for s in shifts if s["id"] not in rolled_up]
+    rows.extend(transactions_for_shifts(client, raw_ids, TXN_COLUMNS))
+    return rows
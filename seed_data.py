@@ -0,0 +1,140 @@
+"""Synthetic shop data for the local backend.
+
+    python seed_data.py --db local.db --years 3 --per-shift 200
+
+generates users, vendors, expense heads and settings, then three shifts a
+day for the given period (all closed except today's, with their rollups)
+and ``per_shift`` transactions in each with a realistic type/source mix.
+3 years x 3 shifts x 200 transactions is about 657k rows.
+"""
+import argparse
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from rollups import summarize_shift
+
+VENDOR_NAMES = [
+    "Al-Shifa Distributors", "City Pharma", "Medicare Traders", "Zam Zam Medical", "Getz Supply",
+    "Searle Wholesale", "Hilton Pharma", "Abbott Agency", "Ferozsons", "Sami Traders",
+    "Highnoon Depot", "Bosch Pharma", "GSK Stockist", "Martin Dow", "Pharmevo Link",
+]
+EXPENSE_HEADS = ["Rent", "Electricity", "Salaries", "Tea & Food", "Transport", "Internet", "Cleaning", "Repairs", "Stationery", "Misc"]
+SHIFT_HOURS = {"Morning": (8, 14), "Evening": (14, 20), "Night": (20, 24)}
+# (type, weight, sources)
+MIX = [
+    ("sale", 70, [None]),
+    ("return", 3, [None]),
+    ("expense", 10, ["sales"] * 4 + ["jaib"]),
+    ("vendor_payment", 5, ["sales", "sales", "jaib"]),
+    ("purchase", 8, ["sales", "jaib", "credit", "credit"]),
+    ("withdrawal", 4, [None]),
+]
+AMOUNTS = {
+    "sale": (50, 3000), "return": (50, 800), "expense": (100, 5000), "vendor_payment": (1000, 25000),
+    "purchase": (1000, 30000), "withdrawal": (500, 10000),
+}
+BATCH = 5000
+
+
+def _timestamp(day, shift_name, rng):
+    start, end = SHIFT_HOURS[shift_name]
+    seconds = rng.randrange(start * 3600, end * 3600)
+    moment = datetime.combine(day, time(), tzinfo=timezone.utc) + timedelta(seconds=seconds, microseconds=rng.randrange(1_000_000))
+    return moment.isoformat(timespec="microseconds")
+
+
+def _insert(client, table, rows):
+    created = []
+    for start in range(0, len(rows), BATCH):
+        created.extend(client.table(table).insert(rows[start:start + BATCH]).execute().data)
+    return created
+
+
+def generate(client, days=365 * 3, per_shift=200, end_date=None, seed=0):
+    """Seed ``days`` days ending at end_date (default today). Returns row counts per table."""
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+
+    client.table("users").upsert([
+        {"username": "admin", "password": "admin", "role": "super_user"},
+        {"username": "owner", "password": "owner", "role": "owner"},
+    ], on_conflict="username").execute()
+    client.table("settings").upsert([
+        {"key": "shop_name", "value": "Pak United Medical Store"},
+        {"key": "shop_address", "value": "Main Bazaar, Lahore"},
+        {"key": "logo_url", "value": "https://placehold.co/150x150?text=Pak+United"},
+    ]).execute()
+    vendor_ids = [v["id"] for v in _insert(client, "vendors", [{"name": n, "is_active": True} for n in VENDOR_NAMES])]
+    head_ids = [h["id"] for h in _insert(client, "expense_heads", [{"name": n, "is_active": True} for n in EXPENSE_HEADS])]
+
+    types = [m[0] for m in MIX]
+    weights = [m[1] for m in MIX]
+    sources = {m[0]: m[2] for m in MIX}
+    counts = {"shifts": 0, "transactions": 0, "daily_rollups": 0}
+    cash = 5000.0
+    day = start_date
+    while day <= end_date:
+        for shift_name in SHIFT_HOURS:
+            is_open = day == end_date
+            shift = client.table("shifts").insert({
+                "date": day.isoformat(), "shift": shift_name, "opening_cash": round(cash, 2), "status": "open",
+                "created_at": datetime.combine(day, time(SHIFT_HOURS[shift_name][0]), tzinfo=timezone.utc).isoformat(timespec="microseconds"),
+            }).execute().data[0]
+            txns = []
+            for _ in range(per_shift):
+                type_ = rng.choices(types, weights)[0]
+                row = {
+                    "shift_id": shift["id"], "type": type_, "source": rng.choice(sources[type_]),
+                    "amount": round(rng.uniform(*AMOUNTS[type_]), 2),
+                    "description": "", "created_at": _timestamp(day, shift_name, rng),
+                }
+                if type_ == "expense":
+                    row["expense_head_id"] = rng.choice(head_ids)
+                elif type_ in ("vendor_payment", "purchase"):
+                    row["vendor_id"] = rng.choice(vendor_ids)
+                txns.append(row)
+            txns.sort(key=lambda t: t["created_at"])
+            _insert(client, "transactions", txns)
+            counts["shifts"] += 1
+            counts["transactions"] += len(txns)
+            expected = cash
+            for t in txns:
+                if t["type"] == "sale":
+                    expected += t["amount"]
+                elif t["type"] == "return":
+                    expected -= t["amount"]
+                elif t["source"] == "sales":
+                    expected -= t["amount"]
+            if is_open:
+                continue
+            actual = round(expected + rng.choice([0, 0, 0, -50, -100, 20]), 2)
+            client.table("shifts").update({
+                "expected_closing": round(expected, 2), "actual_closing": actual,
+                "shortage": round(actual - expected, 2), "status": "closed",
+            }).eq("id", shift["id"]).execute()
+            rollup = summarize_shift(shift, txns)
+            _insert(client, "daily_rollups", rollup)
+            counts["daily_rollups"] += len(rollup)
+            cash = actual
+        day += timedelta(days=1)
+    return counts
+
+
+def main():
+    from local_backend import LocalClient
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="local.db", help="SQLite file for the local backend")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--days", type=int, help="overrides --years")
+    parser.add_argument("--per-shift", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    days = args.days or int(args.years * 365)
+    counts = generate(LocalClient(args.db), days=days, per_shift=args.per_shift, seed=args.seed)
+    print(", ".join(f"{n} {table}" for table, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
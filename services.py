@@ -0,0 +1,360 @@
+"""Shared services of the app's pages.
+
+Imported once per server process: the Supabase client, offline journal and
+report cache are created here (as st.cache_resource singletons) and every
+page uses the helpers below instead of building its own. Heavy libraries
+are not imported at module level; NumPy comes in with aggregation on the
+pages that total transactions, pandas only on the Reports page, and fpdf
+with exporting when a report is built.
+"""
+import os
+from datetime import date
+
+import streamlit as st
+
+from cache import reference_cache
+from offline_queue import OfflineJournal, stamp_idempotency_keys
+from queries import transactions_for_shifts
+from report_cache import ReportCache
+from tracing import TracedClient, tracer
+
+# ---------- Supabase Initialization ----------
+@st.cache_resource
+def init_supabase() -> TracedClient:
+    # PAKUNITED_BACKEND=local runs against the SQLite stand-in (local_backend.py) instead of Supabase
+    if os.environ.get("PAKUNITED_BACKEND") == "local":
+        from local_backend import LocalClient
+        return TracedClient(LocalClient(os.environ.get("LOCAL_DB_PATH", "local.db")), tracer)
+    from supabase import ClientOptions, create_client
+    from transport import http_client
+    url = st.secrets["SUPABASE_URL"]
+    key = st.secrets["SUPABASE_KEY"]
+    # Pooled connections, short timeouts, retries and the offline circuit breaker (transport.py)
+    return TracedClient(create_client(url, key, ClientOptions(httpx_client=http_client())), tracer)
+
+supabase = init_supabase()
+
+def offline():
+    """True while the circuit breaker (transport.py) skips the network."""
+    from transport import breaker
+    return breaker.is_open
+
+def start_trace_run(page):
+    """Trace the queries that follow into a new run kept in the session (see tracing.py)."""
+    if "trace_runs" not in st.session_state:
+        st.session_state.trace_runs = []
+    # Only the super user's performance panel shows payload sizes (app.py)
+    run = tracer.start_run(page, measure_bytes=st.session_state.get("role") == "super_user")
+    st.session_state.trace_runs = st.session_state.trace_runs[-49:] + [run]
+    return run
+
+def fragment_rerun():
+    """True if only a fragment (st.fragment) is rerunning, skipping app.py and the page."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+# ---------- Offline Queue Management ----------
+@st.cache_resource
+def init_journal() -> OfflineJournal:
+    return OfflineJournal()
+
+journal = init_journal()
+
+def add_pending_op(table, data, method="insert"):
+    return journal.enqueue(table, data, method)
+
+@st.cache_resource
+def init_report_cache() -> ReportCache:
+    return ReportCache()
+
+report_cache = init_report_cache()
+
+def invalidate_reports(*dates):
+    """Drop cached reports covering the dates, and today (where new transactions' created_at lands)."""
+    report_cache.invalidate_dates([*dates, date.today()])
+    if replica:
+        replica.mark_written()
+
+def invalidate_reference_data():
+    reference_cache.clear()
+    # Vendor/head names and shop details are baked into cached report tables and PDFs
+    report_cache.clear()
+    if replica:
+        replica.mark_written()
+
+# ---------- Read Replica ----------
+REPLICA_MAX_AGE = 30  # seconds a report may read the replica without pulling changes first
+
+@st.cache_resource
+def init_replica():
+    # PAKUNITED_REPLICA=off sends the reports straight to the backend
+    if os.environ.get("PAKUNITED_REPLICA") == "off":
+        return None
+    from replica import Replica
+    return Replica()
+
+replica = init_replica()
+replica_client = TracedClient(replica.client, tracer) if replica else None
+
+def report_client():
+    """Client the reports read from: the local replica (replica.py) once it has been filled.
+
+    The replica first pulls what changed if this process wrote since its last
+    sync or that is over REPLICA_MAX_AGE old, so a report includes what was
+    just entered; offline, it reads the replica as last synced. Until the
+    first sync (started in the background) completes, reports use the backend.
+    """
+    if replica is None:
+        return supabase
+    if replica.synced_at() is None:
+        replica.sync_in_background(supabase)
+        return supabase
+    if replica.needs_sync(REPLICA_MAX_AGE):
+        try:
+            replica.sync(supabase)
+        except:
+            pass
+    return replica_client
+
+def synced_through(db):
+    """For the reports' checkpoints: when db is the replica, the time it holds every transaction up to."""
+    return replica.synced_through() if replica and db is replica_client else None
+
+def insert_rows(table, rows, shift_date=None):
+    """Insert rows in one bulk request; if that fails, queue them as a single atomic op.
+
+    Rows are keyed before the first attempt, so a request that timed out after
+    reaching the server is not duplicated when the queued copy is replayed.
+    Returns True if the rows were sent, False if they were queued.
+    """
+    if not rows:
+        return True
+    if table == "transactions":
+        invalidate_reports(shift_date)
+    stamp_idempotency_keys(table, rows)
+    try:
+        supabase.table(table).insert(rows).execute()
+        return True
+    except:
+        add_pending_op(table, rows)
+        return False
+
+REFERENCE_TABLES = {"settings", "vendors", "expense_heads"}
+
+def flush_queue():
+    flushed, remaining, error = journal.flush(supabase)
+    if flushed.keys() & REFERENCE_TABLES:
+        invalidate_reference_data()
+    if "transactions" in flushed:
+        # Late rows for an already closed shift make its cached reports stale (the server
+        # adds them to the shift's rollup, migrations/0008_rollup_writes.sql).
+        shift_ids = [i for i in {r.get("shift_id") for r in flushed["transactions"]} if i]
+        try:
+            shift_dates = get_shifts(shift_ids, "date") if shift_ids else []
+            invalidate_reports(*(date.fromisoformat(s["date"]) for s in shift_dates))
+        except:
+            report_cache.clear()
+    if remaining:
+        st.warning(f"Offline: {remaining} operation(s) pending")
+    elif offline():
+        st.warning("Offline: new entries will be saved when connection resumes.")
+    dead = journal.dead_letters()
+    if dead:
+        st.error(f"{len(dead)} queued operation(s) were rejected by the server and are no longer retried.")
+        if st.session_state.get("authenticated"):
+            dead_letters_panel(dead)
+    return remaining == 0
+
+def dead_letters_panel(dead):
+    """Queued ops the journal gave up on (see offline_queue.py), each with Retry and Discard."""
+    with st.sidebar.expander(f"⚠️ Rejected operations ({len(dead)})"):
+        for op in dead:
+            st.caption(f"{op['method']} {op['table']} after {op['attempts']} attempt(s): {op['error']}")
+            st.json(op["data"], expanded=False)
+            col1, col2 = st.columns(2)
+            col1.button("Retry", key=f"dead_retry_{op['op_key']}", on_click=journal.retry_dead, args=(op["op_key"],))
+            col2.button("Discard", key=f"dead_discard_{op['op_key']}", on_click=journal.discard, args=(op["op_key"],))
+
+# ---------- Helper Functions ----------
+def login(username, password):
+    try:
+        response = supabase.table("users").select("id, username, role").eq("username", username).eq("password", password).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        st.error("Login service unavailable. Please check your connection.")
+        return None
+
+def _load_settings():
+    response = supabase.table("settings").select("key, value").execute()
+    return {item["key"]: item["value"] for item in response.data}
+
+def get_settings():
+    try:
+        return reference_cache.get_or_load("settings", _load_settings)
+    except:
+        return {}
+
+def update_setting(key, value):
+    try:
+        supabase.table("settings").upsert({"key": key, "value": value}).execute()
+    except:
+        add_pending_op("settings", {"key": key, "value": value}, "upsert")
+    reference_cache.invalidate("settings")
+    report_cache.clear()
+
+def get_active_expense_heads():
+    try:
+        return reference_cache.get_or_load("active_expense_heads", lambda: supabase.table("expense_heads").select("id, name").eq("is_active", True).execute().data)
+    except:
+        return []
+
+def get_active_vendors():
+    try:
+        return reference_cache.get_or_load("active_vendors", lambda: supabase.table("vendors").select("id, name").eq("is_active", True).execute().data)
+    except:
+        return []
+
+def open_shifts(date_obj, shift_names):
+    """The date's open shift of each name, created server-side in one call if missing. Returns {shift_name: shift}."""
+    shifts = supabase.rpc("open_shifts", {"p_date": date_obj.isoformat(), "p_shifts": list(shift_names)}).execute().data
+    return {s["shift"]: s for s in shifts}
+
+def get_transactions_for_shifts(shift_ids, columns="*"):
+    return transactions_for_shifts(supabase, shift_ids, columns)
+
+SHIFT_NAMES = ["Morning", "Evening", "Night"]
+
+def get_shifts(shift_ids, columns="*"):
+    return supabase.table("shifts").select(columns).in_("id", list(shift_ids)).execute().data
+
+def load_recording_day(date_obj, ledgers=None):
+    """Ledgers (see shift_ledger.py) of the date's three open shifts.
+
+    ledgers are the session's, from an earlier run. If they already hold all
+    of the date's shifts, one read refreshes their shift rows, and they are
+    returned as they are while every shift is still open (or when that read
+    fails, so recording goes on offline). A shift closed since (e.g. on
+    another device) loses its ledger. Then one call opens the
+    date's shifts (open_shifts, creating the missing ones server-side) and
+    one loads the transactions of the shifts that have no ledger; a shift
+    that still has its ledger keeps it.
+    Returns {shift_name: ShiftLedger}.
+    """
+    from shift_ledger import LEDGER_COLUMNS, ShiftLedger, merged_measures, pending_rows
+    ledgers = dict(ledgers or {})
+    if all(name in ledgers and ledgers[name].shift["date"] == date_obj.isoformat() for name in SHIFT_NAMES):
+        try:
+            rows = {s["id"]: s for s in get_shifts(ledger.shift["id"] for ledger in ledgers.values())}
+        except:
+            # Offline: keep recording on the ledgers as they are
+            return ledgers
+        for name, ledger in list(ledgers.items()):
+            ledger.shift = rows.get(ledger.shift["id"], ledger.shift)
+            if not ledger.is_open:
+                del ledgers[name]
+        if len(ledgers) == len(SHIFT_NAMES):
+            return ledgers
+    current = open_shifts(date_obj, SHIFT_NAMES)
+    known = {name: ledgers[name] for name, shift in current.items()
+             if name in ledgers and ledgers[name].shift["id"] == shift["id"]}
+    for name, ledger in known.items():
+        ledger.shift = current[name]
+    unknown = {name: shift for name, shift in current.items() if name not in known}
+    queued = {name: pending_rows(journal, shift["id"]) for name, shift in unknown.items()}
+    txns = get_transactions_for_shifts([s["id"] for s in unknown.values()], "shift_id, " + LEDGER_COLUMNS)
+    by_shift = {}
+    for t in txns:
+        by_shift.setdefault(t["shift_id"], []).append(t)
+    return {**known, **{name: ShiftLedger(shift, merged_measures(by_shift.get(shift["id"], []), queued[name]))
+                        for name, shift in unknown.items()}}
+
+def close_shift(shift_id, actual_cash):
+    """Close the shift server-side (close_shift, migrations/0005_shift_rpc.sql): expected cash,
+    shortage and its daily rollup are written in one transaction.
+
+    The function only returns the shift if this call closed it; a shift that
+    is already closed (e.g. on another device) keeps its counted cash and
+    this returns False.
+    """
+    try:
+        resp = supabase.rpc("close_shift", {"p_shift_id": shift_id, "p_actual_cash": actual_cash}).execute()
+        closed = resp.data[0] if resp.data else None
+        # A server without 0007_close_shift_once.sql returns an already closed shift unchanged
+        if not closed or closed["status"] != "closed" or float(closed["actual_closing"]) != float(actual_cash):
+            st.error("This shift is no longer open: it was already closed, with the cash counted then.")
+            return False
+        invalidate_reports(date.fromisoformat(closed["date"]))
+        return True
+    except Exception as e:
+        st.error(f"Error closing shift: {e}")
+        return False
+
+def get_shop_details():
+    settings = get_settings()
+    return {
+        "name": settings.get("shop_name", "Medical Store"),
+        "address": settings.get("shop_address", "")
+    }
+
+def report_range_closed(start_date, end_date):
+    """True when the range ends before today and none of its shifts is still open."""
+    if end_date >= date.today():
+        return False
+    try:
+        return not supabase.table("shifts").select("id").eq("status", "open").gte("date", start_date.isoformat()).lte("date", end_date.isoformat()).limit(1).execute().data
+    except:
+        return False
+
+def build_report(report, start_date, end_date, filters, make_rows, columns, title):
+    """The report's (CSV, PDF) spooled files, or (None, None) if it has no rows.
+
+    Closed ranges are served from the report cache. Otherwise make_rows() is
+    consumed once, a chunk at a time, into both files (exporting.table_files);
+    pages read the table back from the CSV.
+    """
+    closed = report_range_closed(start_date, end_date)
+    if closed:
+        cached = report_cache.get(report, start_date, end_date, filters)
+        if cached:
+            return cached["csv"], cached["pdf"]
+    import exporting
+    csv_file, pdf_file = exporting.table_files(title, f"{start_date} to {end_date}", columns, make_rows(), get_shop_details())
+    if closed and csv_file:
+        report_cache.put(report, start_date, end_date, filters, csv_file=csv_file, pdf_file=pdf_file)
+    return csv_file, pdf_file
+
+def multi_row_entry(prefix, shift_name, shift_date, fields, build_row, noun, noun_plural, after_submit=lambda batch: st.rerun()):
+    """Editable list of input rows that are submitted together as one bulk insert.
+
+    fields is a list of (name, width, render) where render(key) draws the
+    widget; build_row(values) turns a row's widget values into a transaction
+    dict, or None to skip the row. Adding and removing rows happens in the
+    buttons' callbacks and touches nothing but session state, so inside a
+    fragment it reruns just the fragment. after_submit(batch) runs once the
+    rows are sent or queued.
+    """
+    rows_key = f"{prefix}_rows_{shift_name}"
+    if rows_key not in st.session_state:
+        st.session_state[rows_key] = [0]
+    rows = st.session_state[rows_key]
+    for i in rows:
+        cols = st.columns([width for _, width, _ in fields] + [1])
+        for col, (name, _, render) in zip(cols, fields):
+            with col:
+                render(f"{prefix}_{name}_{shift_name}_{i}")
+        with cols[-1]:
+            st.button("❌", key=f"{prefix}_del_{shift_name}_{i}", on_click=rows.remove, args=(i,))
+    st.button(f"➕ Add another {noun}", key=f"{prefix}_add_{shift_name}", on_click=lambda: rows.append(max(rows) + 1 if rows else 0))
+    if st.button(f"Submit All {noun_plural} for {shift_name}", key=f"{prefix}_submit_{shift_name}"):
+        batch = []
+        for i in rows:
+            row = build_row({name: st.session_state.get(f"{prefix}_{name}_{shift_name}_{i}") for name, _, _ in fields})
+            if row:
+                batch.append(row)
+        if insert_rows("transactions", batch, shift_date):
+            st.success(f"{noun_plural} submitted!")
+        else:
+            st.warning(f"Offline: {len(batch)} {noun_plural.lower()} will be saved when connection resumes.")
+        st.session_state[rows_key] = [0]
+        after_submit(batch)
@@ -0,0 +1,97 @@
+"""Running expected cash of the shifts a session is recording on.
+
+A ShiftLedger holds one shift's cash measures (aggregation.cash_measures)
+and adds every transaction the session writes to them as soon as it is
+sent or queued, so Expected Closing Cash moves without refetching the
+shift. Ops still waiting in the offline journal are counted too, since the
+cashier handed over that cash whether or not the server has the rows yet.
+
+Writes by other sessions only show up when a ledger is reconciled: the
+shift row and the shift's transactions are re-read and its pending journal
+rows added, with rows found in both counted once (by idempotency key).
+poll() does that on the read pool once a ledger is older than
+RECONCILE_AFTER; reconcile() does it on demand. A reconciled ledger whose
+shift was closed meanwhile (e.g. on another device) is no longer is_open,
+and the Recording page replaces it with the shift's next session.
+"""
+import time
+
+from aggregation import cash_measures, expected_cash
+from concurrency import submit
+from queries import transactions_for_shifts
+
+RECONCILE_AFTER = 60  # seconds before poll() re-reads a ledger in the background
+LEDGER_COLUMNS = "type, source, amount, idempotency_key"
+
+
+def pending_rows(journal, shift_id):
+    """The shift's transaction rows still waiting in the offline journal."""
+    rows = []
+    for op in journal.pending():
+        if op["table"] == "transactions" and op["method"] == "insert":
+            data = op["data"] if isinstance(op["data"], list) else [op["data"]]
+            rows.extend(row for row in data if row.get("shift_id") == shift_id)
+    return rows
+
+
+def merged_measures(rows, queued):
+    """cash_measures of a shift's server rows and its queued rows, counting rows in both once.
+
+    Read the journal first: an op flushed in between is then found in both
+    rather than in neither.
+    """
+    sent = {row.get("idempotency_key") for row in rows}
+    return cash_measures(rows + [row for row in queued if row.get("idempotency_key") not in sent])
+
+
+def shift_state(client, journal, shift):
+    """(The shift's current row, its measures with the queued rows.)"""
+    queued = pending_rows(journal, shift["id"])
+    rows = client.table("shifts").select("*").eq("id", shift["id"]).execute().data
+    measures = merged_measures(transactions_for_shifts(client, [shift["id"]], LEDGER_COLUMNS), queued)
+    return (rows[0] if rows else shift), measures
+
+
+class ShiftLedger:
+    def __init__(self, shift, measures):
+        self.shift = shift
+        self.measures = measures
+        self.synced_at = time.monotonic()
+        self._reconciling = None  # Future of a background reconcile
+
+    @property
+    def is_open(self):
+        return self.shift["status"] == "open"
+
+    @property
+    def expected(self):
+        return expected_cash(self.shift["opening_cash"], self.measures)
+
+    def apply(self, rows):
+        """Add transactions this session has just sent or queued."""
+        if not rows:
+            return
+        added = cash_measures(rows)
+        self.measures = {name: total + added[name] for name, total in self.measures.items()}
+        # A reconcile already under way may have read the server before these rows
+        self._reconciling = None
+
+    def reconcile(self, client, journal):
+        """Replace the shift row and running figures with the server's, plus the journal's rows."""
+        self.shift, self.measures = shift_state(client, journal, self.shift)
+        self.synced_at = time.monotonic()
+        self._reconciling = None
+
+    def poll(self, client, journal):
+        """Adopt a finished background reconcile, or start one if the figures are stale.
+
+        A failed reconcile is retried RECONCILE_AFTER later.
+        """
+        future = self._reconciling
+        if future is not None and future.done():
+            self._reconciling = None
+            self.synced_at = time.monotonic()
+            if future.exception() is None:
+                self.shift, self.measures = future.result()
+        elif future is None and time.monotonic() - self.synced_at > RECONCILE_AFTER:
+            self._reconciling = submit(lambda: shift_state(client, journal, self.shift))
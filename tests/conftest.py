@@ -0,0 +1,37 @@
+"""Fixtures for the tests: a seeded local backend (local_backend.LocalClient) per test.
+
+The app's process-wide files (offline journal, report cache, read replica)
+and backend are pointed at a temporary directory before any app module is
+imported, as benchmarks/harness.py does, so tests never touch a shop's files.
+"""
+import os
+import tempfile
+from datetime import date
+
+import pytest
+
+WORK_DIR = tempfile.mkdtemp(prefix="pakunited-tests-")
+os.environ["PAKUNITED_BACKEND"] = "local"
+os.environ["LOCAL_DB_PATH"] = os.path.join(WORK_DIR, "local.db")
+os.environ["OFFLINE_JOURNAL_PATH"] = os.path.join(WORK_DIR, "offline_journal.db")
+os.environ["REPORT_CACHE_PATH"] = os.path.join(WORK_DIR, "report_cache.db")
+os.environ["REPLICA_PATH"] = os.path.join(WORK_DIR, "replica.db")
+os.environ["PAKUNITED_REPLICA"] = "off"
+os.environ["LOCAL_LATENCY_MS"] = "0"
+
+SEED_DAYS = 45
+SEED_PER_SHIFT = 12
+
+
+@pytest.fixture
+def client(tmp_path):
+    from local_backend import LocalClient
+    return LocalClient(str(tmp_path / "local.db"))
+
+
+@pytest.fixture
+def seeded(client):
+    """client with SEED_DAYS days of shifts ending today (today's still open), see seed_data.py."""
+    from seed_data import generate
+    generate(client, days=SEED_DAYS, per_shift=SEED_PER_SHIFT, end_date=date.today())
+    return client
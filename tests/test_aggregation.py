@@ -0,0 +1,100 @@
+import random
+
+import numpy as np
+import pytest
+
+from aggregation import MEASURES, cash_measures, empty_measures
+from models import Transaction
+from transaction_store import SOURCES, TYPES, TransactionStore
+
+
+def _row_sums(rows, by=None):
+    """The measures summed row by row, as the pages did before the columnar store."""
+    def add(totals, row):
+        type_, amount = row.get("type"), float(row.get("amount") or 0.0)
+        from_till = row.get("source") == "sales"
+        totals["sales"] += amount if type_ == "sale" else 0.0
+        totals["returns"] += amount if type_ == "return" else 0.0
+        totals["expenses"] += amount if type_ == "expense" and from_till else 0.0
+        totals["vendor_payments"] += amount if type_ == "vendor_payment" and from_till else 0.0
+        totals["purchases"] += amount if type_ == "purchase" and from_till else 0.0
+        totals["withdrawals"] += amount if type_ == "withdrawal" else 0.0
+        totals["cash_out"] += amount if type_ in ("expense", "vendor_payment", "purchase", "withdrawal") and from_till else 0.0
+
+    if by is None:
+        totals = empty_measures()
+        for row in rows:
+            add(totals, row)
+        return totals
+    groups = {}
+    for row in rows:
+        key = row.get(by) if isinstance(by, str) else tuple(row.get(k) for k in by)
+        add(groups.setdefault(key, empty_measures()), row)
+    return groups
+
+
+def _assert_close(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        if key in MEASURES:
+            assert actual[key] == pytest.approx(expected[key])
+        else:
+            _assert_close(actual[key], expected[key])
+
+
+@pytest.fixture
+def mixed_rows():
+    """Random rows with missing ids, sources and amounts, unknown types and rollup-shaped rows."""
+    rng = random.Random(7)
+    rows = []
+    for _ in range(3000):
+        row = {
+            "type": rng.choice(TYPES + ["adjustment", None]),
+            "source": rng.choice(SOURCES + [None, "bank"]),
+            "amount": rng.choice([round(rng.uniform(0, 500), 2), None, "12.50"]),
+            "shift_id": rng.choice([1, 2, 3, None]),
+            "vendor_id": rng.choice([10, 11, None]),
+            "expense_head_id": rng.choice([20, None]),
+            "date": rng.choice(["2024-03-01", "2024-03-02", "2024-02-29", None]),
+        }
+        rows.append(row)
+    # daily_rollups rows: only shift_id, type, source and total as amount
+    rows += [{"shift_id": s, "type": "sale", "source": "sales", "amount": 100.0} for s in (1, 4)]
+    return rows
+
+
+def test_totals_match_row_sums(mixed_rows, seeded):
+    _assert_close(cash_measures(mixed_rows), _row_sums(mixed_rows))
+    txns = seeded.table("transactions").select("*").execute().data
+    _assert_close(cash_measures(txns), _row_sums(txns))
+    _assert_close(cash_measures(Transaction.from_rows(txns)), _row_sums(txns))
+
+
+@pytest.mark.parametrize("by", ["shift_id", "vendor_id", "expense_head_id", ["shift_id", "vendor_id"],
+                                ["vendor_id", "expense_head_id", "shift_id"], "date", ["date", "shift_id"]])
+def test_grouped_totals_match_row_sums(mixed_rows, by):
+    grouped = cash_measures(mixed_rows, by=by)
+    _assert_close(grouped, _row_sums(mixed_rows, by))
+    # Missing ids (stored as -1) come back as None
+    assert (None in grouped) if isinstance(by, str) else any(None in key for key in grouped)
+
+
+def test_no_rows():
+    assert cash_measures([]) == empty_measures()
+    assert cash_measures([], by="shift_id") == {}
+    assert cash_measures([], by=["shift_id", "vendor_id"]) == {}
+
+
+def test_appending_in_batches_matches_building_at_once(mixed_rows):
+    whole = TransactionStore.from_rows(mixed_rows, ["date"])
+    store = TransactionStore(capacity=4, keys=["date"])
+    for start in range(0, len(mixed_rows), 700):
+        store.append(mixed_rows[start:start + 700])
+    store.append([])
+    assert len(store) == len(whole) == len(mixed_rows)
+    for name in [*TransactionStore.COLUMNS, "date"]:
+        assert np.array_equal(store.column(name), whole.column(name))
+    _assert_close(cash_measures(store, by=["date", "shift_id"]), _row_sums(mixed_rows, ["date", "shift_id"]))
+    # A later batch can bring new key values
+    store.append([{"type": "sale", "source": "sales", "amount": 5.0, "date": "2024-03-03"}])
+    assert cash_measures(store, by="date")["2024-03-03"]["sales"] == 5.0
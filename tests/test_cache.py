@@ -0,0 +1,25 @@
+import pytest
+
+from cache import TTLCache
+from transport import Offline
+
+
+def _unreachable():
+    raise Offline("Supabase unreachable")
+
+
+def test_serves_the_expired_value_while_the_loader_fails():
+    cache = TTLCache(ttl=0)
+    assert cache.get_or_load("vendors", lambda: ["A"]) == ["A"]
+    assert cache.get_or_load("vendors", _unreachable) == ["A"]
+    assert cache.get_or_load("vendors", lambda: ["A", "B"]) == ["A", "B"]
+
+
+def test_a_miss_still_fails():
+    cache = TTLCache()
+    with pytest.raises(Offline):
+        cache.get_or_load("vendors", _unreachable)
+    cache.get_or_load("vendors", lambda: ["A"])
+    cache.invalidate("vendors")
+    with pytest.raises(Offline):
+        cache.get_or_load("vendors", _unreachable)
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from checkpoints import jaib_delta, month_start, opening_balance, vendor_delta, vendor_ledger
+from models import Transaction
+
+
+def _history(client, before):
+    return Transaction.from_rows(client.table("transactions").select("*").lt("created_at", before.isoformat()).execute().data)
+
+
+def test_opening_balance_equals_all_history_before_the_date(seeded):
+    day = date.today() - timedelta(days=20)
+    txns = _history(seeded, day)
+    assert abs(opening_balance(seeded, vendor_ledger(0), day) - sum(vendor_delta(t) for t in txns)) < 0.01
+    assert abs(opening_balance(seeded, vendor_ledger(3), day) - sum(vendor_delta(t) for t in txns if t.vendor_id == 3)) < 0.01
+    pocket = sum(jaib_delta(t) for t in txns if t.source == "jaib") - sum(t.amount for t in txns if t.type == "withdrawal")
+    assert abs(opening_balance(seeded, "jaib", day) - pocket) < 0.01
+
+
+def test_checkpoints_are_written_and_reused(seeded):
+    day = date.today() - timedelta(days=5)
+    first = opening_balance(seeded, "jaib", day)
+    checkpoints = seeded.table("balance_checkpoints").select("*").eq("ledger", "jaib").execute().data
+    assert checkpoints and max(c["month"] for c in checkpoints) == month_start(day).isoformat()
+    # A later checkpoint is used as the starting point; the balance is the same
+    seeded.table("balance_checkpoints").upsert({"ledger": "jaib", "month": month_start(day).isoformat(), "balance": 1000.0}).execute()
+    assert opening_balance(seeded, "jaib", day) != first
+    seeded.table("balance_checkpoints").delete().eq("ledger", "jaib").execute()
+    assert abs(opening_balance(seeded, "jaib", day) - first) < 0.01
+
+
+def test_opening_balance_without_history_is_zero(client):
+    assert opening_balance(client, "jaib", date.today()) == 0.0
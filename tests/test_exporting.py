@@ -0,0 +1,51 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+import exporting
+
+SHOP = {"name": "Shop", "address": "Street 1"}
+
+
+def test_table_files_consume_the_rows_once():
+    consumed = []
+
+    def rows():
+        for i in range(2500):
+            consumed.append(i)
+            yield [f"2024-01-{i % 28 + 1:02d}", f"Row ₹{i}", f"{i:.2f}"]
+
+    csv_file, pdf_file = exporting.table_files("Title", "a to b", ["Date", "Description", "Amount"], rows(), SHOP)
+    assert len(consumed) == 2500
+    table = list(csv.reader(io.TextIOWrapper(csv_file, encoding="utf-8", newline="")))
+    assert table[0] == ["Date", "Description", "Amount"]
+    assert table[1:] == [[f"2024-01-{i % 28 + 1:02d}", f"Row ₹{i}", f"{i:.2f}"] for i in range(2500)]
+    assert exporting.reader(pdf_file)().startswith(b"%PDF")
+
+
+def test_table_files_without_rows():
+    assert exporting.table_files("Title", "a to b", ["Date"], iter([]), SHOP) == (None, None)
+
+
+def test_pdfs_share_the_parsed_font():
+    if not exporting.unicode_fonts():
+        pytest.skip("no Unicode font installed")
+
+    class Parsing(exporting.ReportPDF):
+        def add_parsed_font(self, style, path):
+            self.add_font("Unicode", style, path)
+
+    def pdf_bytes(cls, text):
+        pdf = cls(SHOP, "Title", "a to b")
+        pdf.set_creation_date(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        pdf.add_page()
+        pdf.start_table(["Description", "Amount"])
+        pdf.table_rows([[text, "₹5"]] * 100)
+        return bytes(pdf.output())
+
+    # Writing a PDF subsets its copy of the font, not the parsed one the next PDF starts from
+    for text in ["Row ₹ 123", "Other ÄÖ text", "Row ₹ 123"]:
+        assert pdf_bytes(exporting.ReportPDF, text) == pdf_bytes(Parsing, text)
+    assert exporting._parsed_font.cache_info().currsize == 2  # regular and bold
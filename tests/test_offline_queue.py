@@ -0,0 +1,166 @@
+import httpx
+import pytest
+
+import offline_queue
+from offline_queue import OfflineJournal, failure_kind
+
+
+class APIError(Exception):
+    """Stand-in for postgrest's APIError, which carries the SQLSTATE / HTTP status as code."""
+
+    def __init__(self, code):
+        super().__init__(f"error {code}")
+        self.code = code
+
+
+class FailingClient:
+    """Client whose requests raise error (while it is set) instead of reaching backend."""
+
+    def __init__(self, backend, error=None):
+        self.backend = backend
+        self.error = error
+        self.requests = 0
+
+    def table(self, name):
+        return _FailingQuery(self, self.backend.table(name))
+
+
+class _FailingQuery:
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return _FailingQuery(self._client, getattr(self._query, name)(*args, **kwargs))
+        return call
+
+    def execute(self):
+        self._client.requests += 1
+        if self._client.error is not None:
+            raise self._client.error
+        return self._query.execute()
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(offline_queue, "RETRY_AFTER", 0)
+    return OfflineJournal(str(tmp_path / "journal.db"))
+
+
+def _sale(shift_id, amount, **extra):
+    return {"shift_id": shift_id, "type": "sale", "amount": amount, "description": "", **extra}
+
+
+def _amounts(client):
+    return [t["amount"] for t in client.table("transactions").select("amount").order("id").execute().data]
+
+
+def test_failure_kinds():
+    assert failure_kind(httpx.ConnectError("down")) == "offline"
+    assert failure_kind(APIError(503)) == failure_kind(APIError("57014")) == failure_kind(APIError("40001")) == "transient"
+    assert failure_kind(APIError(400)) == failure_kind(APIError("23502")) == failure_kind(APIError("PGRST204")) == "permanent"
+
+
+def test_ops_replay_in_order_in_bulk(client, journal):
+    for amount in (1.0, 2.0, 3.0):
+        journal.enqueue("transactions", _sale(1, amount))
+    journal.enqueue("settings", {"key": "shop_name", "value": "A"}, "upsert")
+    journal.enqueue("settings", {"key": "shop_name", "value": "B"}, "upsert")
+    counting = FailingClient(client)
+    flushed, remaining, error = journal.flush(counting)
+    assert (remaining, error) == (0, None)
+    assert len(flushed["transactions"]) == 3
+    assert counting.requests == 2  # one bulk request per table
+    assert _amounts(client) == [1.0, 2.0, 3.0]
+    assert client.table("settings").select("value").eq("key", "shop_name").execute().data == [{"value": "B"}]
+
+
+def test_replay_after_the_first_attempt_landed_adds_no_duplicate(client, journal):
+    row = _sale(1, 5.0)
+    journal.enqueue("transactions", row)
+    # The request that timed out had reached the server after all
+    client.table("transactions").insert(row).execute()
+    assert journal.flush(client)[1:] == (0, None)
+    assert _amounts(client) == [5.0]
+
+
+def test_offline_keeps_every_op_queued(client, journal):
+    journal.enqueue("transactions", _sale(1, 1.0))
+    journal.enqueue("transactions", [_sale(1, 2.0), _sale(1, 3.0)])
+    offline = FailingClient(client, httpx.ConnectError("no route"))
+    for _ in range(offline_queue.MAX_ATTEMPTS + 2):
+        flushed, remaining, error = journal.flush(offline)
+        assert (flushed, remaining) == ({}, 2) and isinstance(error, httpx.ConnectError)
+    assert journal.dead_letters() == []
+    offline.error = None
+    assert journal.flush(offline)[1:] == (0, None)
+    assert _amounts(client) == [1.0, 2.0, 3.0]
+
+
+def test_poison_op_is_dead_lettered_and_the_rest_are_sent(client, journal):
+    journal.enqueue("transactions", _sale(1, 1.0))
+    journal.enqueue("transactions", {**_sale(1, 2.0), "type": None})  # NOT NULL violation
+    journal.enqueue("transactions", _sale(1, 3.0))
+    journal.enqueue("transactions", _sale(1, 4.0, bogus_column="x"))  # unknown column
+    journal.enqueue("transactions", _sale(1, 5.0))
+    flushed, remaining, error = journal.flush(client)
+    assert remaining == 0 and error is not None
+    assert _amounts(client) == [1.0, 3.0, 5.0]
+    dead = journal.dead_letters()
+    assert [op["data"]["amount"] for op in dead] == [2.0, 4.0]
+    assert all(op["error"] and op["dead_at"] for op in dead)
+    # Later flushes do not retry them; a sale queued later goes through
+    journal.enqueue("transactions", _sale(1, 6.0))
+    assert journal.flush(client)[1:] == (0, None)
+    assert _amounts(client) == [1.0, 3.0, 5.0, 6.0]
+
+
+def test_server_errors_are_retried_then_dead_lettered(client, journal):
+    journal.enqueue("transactions", _sale(1, 1.0))
+    failing = FailingClient(client, APIError(503))
+    for attempt in range(1, offline_queue.MAX_ATTEMPTS):
+        assert journal.flush(failing)[1] == 1
+        assert journal.dead_letters() == []
+    assert journal.flush(failing)[1] == 0
+    [dead] = journal.dead_letters()
+    assert dead["attempts"] == offline_queue.MAX_ATTEMPTS
+
+
+def test_dead_letters_can_be_retried_or_discarded(client, journal):
+    first = journal.enqueue("transactions", {**_sale(1, 1.0), "type": None})
+    second = journal.enqueue("settings", {"key": "shop_name", "colour": "x"}, "insert")
+    journal.flush(client)
+    assert [op["op_key"] for op in journal.dead_letters()] == [first, second]
+    journal.discard(second)
+    journal.retry_dead(first)
+    assert journal.dead_letters() == [] and journal.count() == 1
+    assert journal.flush(client)[1] == 0
+    assert [op["op_key"] for op in journal.dead_letters()] == [first]
+
+
+def test_journal_survives_a_restart(client, tmp_path):
+    path = str(tmp_path / "journal.db")
+    OfflineJournal(path).enqueue("transactions", _sale(1, 7.0))
+    reopened = OfflineJournal(path)
+    assert reopened.count() == 1
+    assert reopened.flush(client)[1] == 0
+    assert _amounts(client) == [7.0]
+
+
+def test_offline_warning_without_pending_ops(monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    import services
+
+    def page():
+        from services import flush_queue
+        flush_queue()
+
+    monkeypatch.setattr(services, "offline", lambda: True)
+    app = AppTest.from_function(page).run()
+    assert [w.value for w in app.warning] == ["Offline: new entries will be saved when connection resumes."]
+
+    monkeypatch.setattr(services.journal, "flush", lambda client: ({}, 1, None))
+    app.run()
+    assert [w.value for w in app.warning] == ["Offline: 1 operation(s) pending"]
@@ -0,0 +1,120 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from transport import Offline
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _unreachable(*args, **kwargs):
+    raise Offline("Supabase unreachable")
+
+
+@pytest.fixture(scope="module")
+def app_db():
+    """The app's own local backend, seeded once for the page tests."""
+    from local_backend import LocalClient
+    from seed_data import generate
+    generate(LocalClient(os.environ["LOCAL_DB_PATH"]), days=3, per_shift=5, end_date=date.today() - timedelta(days=1))
+
+
+def test_load_recording_day_reuses_the_sessions_ledgers(app_db, monkeypatch):
+    import services
+    ledgers = services.load_recording_day(date.today())
+    assert set(ledgers) == set(services.SHIFT_NAMES)
+
+    monkeypatch.setattr(services, "open_shifts", _unreachable)
+    assert services.load_recording_day(date.today(), ledgers) == ledgers
+    with pytest.raises(Offline):
+        services.load_recording_day(date.today() - timedelta(days=1), ledgers)
+    partial = {name: ledgers[name] for name in services.SHIFT_NAMES[:2]}
+    with pytest.raises(Offline):
+        services.load_recording_day(date.today(), partial)
+    # Offline, the session's ledgers are used as they are
+    monkeypatch.setattr(services, "get_shifts", _unreachable)
+    assert services.load_recording_day(date.today(), ledgers) == ledgers
+
+
+def test_ledgers_of_shifts_closed_elsewhere_are_replaced(app_db):
+    import services
+    ledgers = services.load_recording_day(date.today())
+    morning = ledgers["Morning"]
+    # Another device closes the Morning shift
+    services.supabase.rpc("close_shift", {"p_shift_id": morning.shift["id"], "p_actual_cash": 100.0}).execute()
+
+    morning.reconcile(services.supabase, services.journal)
+    assert not morning.is_open
+    reloaded = services.load_recording_day(date.today(), ledgers)
+    assert reloaded["Morning"].is_open and reloaded["Morning"].shift["id"] != morning.shift["id"]
+    assert all(reloaded[name] is ledgers[name] for name in ("Evening", "Night"))
+
+
+def test_closing_a_shift_closed_elsewhere_fails(app_db):
+    import services
+    shift = services.open_shifts(date.today(), ["Evening"])["Evening"]
+    assert services.close_shift(shift["id"], 100.0)
+    assert not services.close_shift(shift["id"], 999.0)
+    [row] = services.supabase.table("shifts").select("status, actual_closing").eq("id", shift["id"]).execute().data
+    assert row == {"status": "closed", "actual_closing": 100.0}
+
+
+def test_recording_page_keeps_its_ledgers_during_an_outage(app_db, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    import services
+    import views
+
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    app.text_input[0].input("admin")
+    app.text_input[1].input("admin")
+    app.button[0].click().run()
+    app.switch_page(views.PAGES["Recording"]).run()
+    ledgers = dict(app.session_state["rec_day"])
+    assert set(ledgers) == set(services.SHIFT_NAMES)
+    expected = [info.value for info in app.info]
+
+    monkeypatch.setattr(services, "open_shifts", _unreachable)
+    monkeypatch.setattr(services, "get_transactions_for_shifts", _unreachable)
+    monkeypatch.setattr(services, "get_shifts", _unreachable)
+    app.run()
+    assert not app.exception and not app.error
+    assert app.session_state["rec_day"] == ledgers
+    assert [info.value for info in app.info] == expected
+
+    # A date with no ledgers yet cannot be loaded, and does not show another date's shifts
+    app.date_input[0].set_value(date.today() - timedelta(days=1)).run()
+    assert "Error accessing shift" in app.error[0].value
+    assert app.session_state["rec_day"] == {}
+
+
+def test_recording_page_moves_to_the_next_session_of_a_shift_closed_elsewhere(app_db):
+    from streamlit.testing.v1 import AppTest
+
+    import services
+    import views
+
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    app.text_input[0].input("admin")
+    app.text_input[1].input("admin")
+    app.button[0].click().run()
+    app.switch_page(views.PAGES["Recording"]).run()
+    morning = app.session_state["rec_day"]["Morning"].shift
+    services.supabase.rpc("close_shift", {"p_shift_id": morning["id"], "p_actual_cash": 100.0}).execute()
+
+    app.run()
+    assert not app.exception and not app.error
+    assert "closed on another device" in app.warning[0].value
+    ledger = app.session_state["rec_day"]["Morning"]
+    assert ledger.is_open and ledger.shift["id"] != morning["id"]
+    # A sale now goes into the new session, and closing it records the counted cash
+    app.number_input(key="sale_amt_Morning").set_value(500.0)
+    app.button(key="FormSubmitter:sale_Morning-Add Sale").click().run()
+    assert services.supabase.table("transactions").select("shift_id").eq("amount", 500.0).eq("shift_id", ledger.shift["id"]).execute().data
+    app.number_input(key="actual_Morning").set_value(999.0)
+    app.button(key="close_Morning").click().run()
+    [row] = services.get_shifts([ledger.shift["id"]], "status, actual_closing")
+    assert row == {"status": "closed", "actual_closing": 999.0}
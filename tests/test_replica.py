@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+from checkpoints import opening_balance
+from replica import TABLES, Replica
+from seed_data import generate
+
+
+@pytest.fixture
+def source(client):
+    # Seeded rows carry their created_at as updated_at; keep them all in the past like the server's
+    generate(client, days=10, per_shift=10, end_date=date.today() - timedelta(days=2))
+    return client
+
+
+def _count(client, table):
+    return len(client.table(table).select("id").execute().data)
+
+
+def test_sync_copies_then_pulls_only_changes(source, tmp_path):
+    replica = Replica(str(tmp_path / "replica.db"))
+    assert replica.synced_at() is None
+    pulled = replica.sync(source)
+    for table in TABLES:
+        assert pulled[table] == _count(source, table) == _count(replica.client, table)
+    assert replica.synced_at() is not None and not replica.needs_sync(60)
+
+    shift = source.table("shifts").select("id").eq("status", "open").limit(1).execute().data[0]
+    source.table("transactions").insert({"shift_id": shift["id"], "type": "sale", "amount": 42.5}).execute()
+    source.table("vendors").update({"name": "Renamed"}).eq("id", 1).execute()
+    source.table("expense_heads").delete().eq("id", 10).execute()
+    replica.mark_written()
+    assert replica.needs_sync(60)
+    pulled = replica.sync(source)
+    # Only rows changed within the last SYNC_OVERLAP seconds are re-read, not the whole history
+    assert pulled["transactions"] < _count(source, "transactions")
+    assert replica.client.table("transactions").select("amount").eq("amount", 42.5).execute().data
+    assert replica.client.table("vendors").select("name").eq("id", 1).execute().data == [{"name": "Renamed"}]
+    assert not replica.client.table("expense_heads").select("id").eq("id", 10).execute().data
+
+
+def test_sync_builds_rollups_of_closed_shifts(source, tmp_path):
+    replica = Replica(str(tmp_path / "replica.db"))
+    replica.sync(source)
+    closed = source.table("shifts").select("id").eq("status", "closed").execute().data
+    rolled_up = {r["shift_id"] for r in replica.client.table("daily_rollups").select("shift_id").execute().data}
+    assert rolled_up == {s["id"] for s in closed}
+
+
+def test_checkpoints_wait_for_the_sync_to_pass_the_month(client, tmp_path):
+    def pocket(amount, at):
+        client.table("transactions").insert({"shift_id": 1, "type": "expense", "source": "jaib", "amount": amount,
+                                             "created_at": at, "updated_at": at}).execute()
+
+    def balance():
+        replica.sync(client)
+        return opening_balance(replica.client, "jaib", date(2024, 2, 1), replica.synced_through())
+
+    def checkpoints():
+        return {c["month"]: c["balance"] for c in replica.client.table("balance_checkpoints").select("month, balance").execute().data}
+
+    replica = Replica(str(tmp_path / "replica.db"))
+    assert replica.synced_through() == ""
+    pocket(10.0, "2024-01-15T10:00:00.000000+00:00")
+    pocket(1.0, "2024-02-01T00:00:30.000000+00:00")
+    assert balance() == 10.0
+    # The replica may still lack January rows committed late, so February has no checkpoint yet
+    assert checkpoints() == {"2024-01-01": 0.0}
+    pocket(5.0, "2024-01-31T23:59:50.000000+00:00")
+    assert balance() == 15.0
+    pocket(2.0, "2024-02-01T00:05:00.000000+00:00")
+    assert balance() == 15.0
+    assert checkpoints() == {"2024-01-01": 0.0, "2024-02-01": 15.0}
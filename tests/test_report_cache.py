@@ -0,0 +1,33 @@
+import io
+from datetime import date
+
+from report_cache import ReportCache
+
+
+def test_put_get_and_invalidate(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.db"))
+    jan, feb = (date(2024, 1, 1), date(2024, 1, 31)), (date(2024, 2, 1), date(2024, 2, 29))
+    csv_file = io.BytesIO(b"csv")
+    cache.put("shift", *jan, "All", csv_file=csv_file, pdf_file=io.BytesIO(b"pdf"))
+    assert csv_file.read() == b"csv"  # rewound for the caller
+    cache.put("pl", *feb, "cogs=0.00", [10.0, 2.5], pdf_file=io.BytesIO(b"pdf2"))
+    cached = cache.get("shift", *jan, "All")
+    assert (cached["csv"].read(), cached["pdf"].read()) == (b"csv", b"pdf")
+    cached = cache.get("pl", *feb, "cogs=0.00")
+    assert cached["rows"] == [10.0, 2.5] and cached["csv"] is None and cached["pdf"].read() == b"pdf2"
+    assert cache.get("shift", *jan, "Night") is None
+    assert cache.get("expense", *jan, "All") is None
+
+    cache.invalidate_dates([date(2024, 1, 15), None])
+    assert cache.get("shift", *jan, "All") is None
+    assert cache.get("pl", *feb, "cogs=0.00") is not None
+    cache.clear()
+    assert cache.get("pl", *feb, "cogs=0.00") is None
+
+
+def test_large_files_round_trip(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.db"))
+    data = bytes(range(256)) * 20000  # several copy chunks
+    cache.put("ledger", date(2024, 1, 1), date(2024, 1, 31), "", csv_file=io.BytesIO(data), pdf_file=io.BytesIO(b""))
+    cached = cache.get("ledger", date(2024, 1, 1), date(2024, 1, 31), "")
+    assert cached["csv"].read() == data and cached["pdf"].read() == b""
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import reports
+from checkpoints import jaib_delta, vendor_delta
+from models import Transaction
+
+
+def _sum(rows, *, type_, from_till=False):
+    return sum(t["amount"] for t in rows if t["type"] == type_ and (not from_till or t["source"] == "sales"))
+
+
+def test_shift_report_matches_per_shift_totals(seeded):
+    start, end = date.today() - timedelta(days=10), date.today()
+    rows = list(reports.shift_report(seeded, start, end))
+    shifts = seeded.table("shifts").select("*").gte("date", start.isoformat()).lte("date", end.isoformat()).order("created_at").order("id").execute().data
+    assert len(rows) == len(shifts) + 1
+    totals = [0.0] * 5
+    for row, s in zip(rows, shifts):
+        txns = seeded.table("transactions").select("*").eq("shift_id", s["id"]).execute().data
+        expected = [_sum(txns, type_="sale"), _sum(txns, type_="expense", from_till=True),
+                    _sum(txns, type_="vendor_payment", from_till=True), _sum(txns, type_="withdrawal"), s["shortage"]]
+        assert row[:2] == [s["date"], s["shift"]]
+        assert row[2:7] == [f"{v:.2f}" for v in expected]
+        totals = [a + b for a, b in zip(totals, expected)]
+    assert rows[-1] == ["GRAND TOTAL", "", *(f"{v:.2f}" for v in totals), "", ""]
+
+
+def test_shift_report_filters_by_shift_and_is_empty_without_shifts(seeded):
+    start, end = date.today() - timedelta(days=3), date.today()
+    rows = list(reports.shift_report(seeded, start, end, "Night"))
+    assert {r[1] for r in rows[:-1]} == {"Night"}
+    assert len(rows) == 5
+    assert list(reports.shift_report(seeded, date(2000, 1, 1), date(2000, 1, 31))) == []
+
+
+def test_expense_report_of_one_head(seeded):
+    start, end = date.today() - timedelta(days=20), date.today()
+    rows = list(reports.expense_report(seeded, start, end, 1))
+    raw = [t for t in seeded.table("transactions").select("*").eq("type", "expense").eq("expense_head_id", 1).execute().data
+           if start.isoformat() <= t["created_at"][:10] <= end.isoformat()]
+    assert len(rows) == len(raw) > 0
+    assert {r[1] for r in rows} == {"Rent"}
+    assert abs(sum(float(r[3]) for r in rows) - sum(t["amount"] for t in raw)) < 0.01
+
+
+def test_running_balances_continue_from_before_the_range(seeded):
+    """The last balance of a range equals the sum over all history up to its end."""
+    start, end = date.today() - timedelta(days=15), date.today()
+    txns = Transaction.from_rows(seeded.table("transactions").select("*").lte("created_at", (end + timedelta(days=1)).isoformat()).execute().data)
+    vendor_rows = list(reports.vendor_report(seeded, start, end))
+    owed = sum(vendor_delta(t) for t in txns)
+    assert abs(float(vendor_rows[-1][4]) - owed) < 0.01
+    ledger_rows = list(reports.personal_ledger(seeded, start, end))
+    pocket = sum(jaib_delta(t) for t in txns if t.source == "jaib") - sum(t.amount for t in txns if t.type == "withdrawal")
+    assert abs(float(ledger_rows[-1][4]) - pocket) < 0.01
+    assert ledger_rows[0][1] == "Opening Balance"
@@ -0,0 +1,41 @@
+"""The shift functions of migrations/0005_shift_rpc.sql and 0007, as local_backend mirrors them."""
+from datetime import date, timedelta
+
+
+def _open(client, day, names):
+    return {s["shift"]: s for s in client.rpc("open_shifts", {"p_date": day.isoformat(), "p_shifts": names}).execute().data}
+
+
+def test_open_shifts_creates_each_shift_once(client):
+    day = date(2024, 5, 1)
+    first = _open(client, day, ["Morning", "Evening", "Night"])
+    assert list(first) == ["Morning", "Evening", "Night"]
+    again = _open(client, day, ["Night", "Morning"])
+    assert {name: s["id"] for name, s in again.items()} == {"Night": first["Night"]["id"], "Morning": first["Morning"]["id"]}
+    assert len(client.table("shifts").select("id").execute().data) == 3
+
+
+def test_close_shift_then_next_shift_opens_with_its_cash(client):
+    day = date(2024, 5, 1)
+    morning = _open(client, day, ["Morning"])["Morning"]
+    client.table("transactions").insert([
+        {"shift_id": morning["id"], "type": "sale", "amount": 500.0},
+        {"shift_id": morning["id"], "type": "expense", "source": "sales", "amount": 50.0},
+        {"shift_id": morning["id"], "type": "expense", "source": "jaib", "amount": 70.0},
+        {"shift_id": morning["id"], "type": "return", "amount": 20.0},
+    ]).execute()
+    [closed] = client.rpc("close_shift", {"p_shift_id": morning["id"], "p_actual_cash": 400.0}).execute().data
+    assert (closed["status"], closed["expected_closing"], closed["shortage"]) == ("closed", 430.0, -30.0)
+    rollup = client.table("daily_rollups").select("type, source, total, txn_count").eq("shift_id", morning["id"]).execute().data
+    assert sorted((r["type"], r["source"], r["total"], r["txn_count"]) for r in rollup) == [
+        ("expense", "jaib", 70.0, 1), ("expense", "sales", 50.0, 1), ("return", "", 20.0, 1), ("sale", "", 500.0, 1)]
+    # Closing again (e.g. from another device) returns no row and keeps the counted cash, as does an unknown id
+    assert client.rpc("close_shift", {"p_shift_id": morning["id"], "p_actual_cash": 1.0}).execute().data == []
+    assert client.table("shifts").select("*").eq("id", morning["id"]).execute().data == [closed]
+    assert client.rpc("close_shift", {"p_shift_id": 999, "p_actual_cash": 1.0}).execute().data == []
+
+    assert _open(client, day, ["Evening"])["Evening"]["opening_cash"] == 400.0
+    # The next day's Morning starts from the previous Night
+    night = _open(client, day, ["Night"])["Night"]
+    client.rpc("close_shift", {"p_shift_id": night["id"], "p_actual_cash": 250.0}).execute()
+    assert _open(client, day + timedelta(days=1), ["Morning"])["Morning"]["opening_cash"] == 250.0
@@ -0,0 +1,90 @@
+"""The shift functions against real Postgres: migrations applied by migrate.py, then
+open_shifts and close_shift called at once from several connections.
+
+Runs only with DATABASE_URL set (a scratch database: the test adds and removes
+shifts on a far-off date) and psycopg installed.
+"""
+import os
+import threading
+from datetime import date
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+import migrate
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+DAY = date(2099, 1, 1)
+THREADS = 8
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="needs DATABASE_URL (a scratch Postgres)")
+
+
+def _clear(conn):
+    conn.execute("delete from transactions where shift_id in (select id from shifts where date = %s)", (DAY,))
+    conn.execute("delete from shifts where date = %s", (DAY,))
+
+
+@pytest.fixture
+def pg():
+    with migrate.connect(DATABASE_URL) as conn:
+        migrate.apply(conn)
+        _clear(conn)
+        yield conn
+        _clear(conn)
+
+
+def _at_once(call):
+    """call(conn) from THREADS connections, released together; returns their results."""
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+    errors = []
+
+    def run(i):
+        try:
+            with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+                barrier.wait()
+                results[i] = call(conn)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    return results
+
+
+def test_concurrent_open_shifts_create_each_shift_once(pg):
+    names = ["Morning", "Evening", "Night"]
+    results = _at_once(lambda conn: conn.execute("select id, shift from open_shifts(%s, %s)", (DAY, names)).fetchall())
+    assert all([shift for _, shift in rows] == names for rows in results)
+    assert len({tuple(rows) for rows in results}) == 1
+    [(count,)] = pg.execute("select count(*) from shifts where date = %s", (DAY,)).fetchall()
+    assert count == 3
+
+
+def test_concurrent_close_shift_closes_once(pg):
+    [(shift_id,)] = pg.execute("select id from open_shifts(%s, %s)", (DAY, ["Morning"])).fetchall()
+    pg.execute("insert into transactions (shift_id, type, amount) values (%s, 'sale', 500)", (shift_id,))
+    results = _at_once(lambda conn: conn.execute(
+        "select actual_closing from close_shift(%s, %s)", (shift_id, 100 + threading.get_ident() % 1000)).fetchall())
+
+    # Exactly one call closed the shift; the others got no row and did not change it
+    [[(closed_with,)]] = [rows for rows in results if rows]
+    [(status, actual, expected)] = pg.execute(
+        "select status, actual_closing, expected_closing from shifts where id = %s", (shift_id,)).fetchall()
+    assert (status, actual, expected) == ("closed", closed_with, 500)
+    assert pg.execute("select * from close_shift(%s, 1)", (shift_id,)).fetchall() == []
+    [(actual,)] = pg.execute("select actual_closing from shifts where id = %s", (shift_id,)).fetchall()
+    assert actual == closed_with
+
+    # A late entry is rolled up at once (0008), and a rebuild gives the same rollup
+    pg.execute("insert into transactions (shift_id, type, amount) values (%s, 'sale', 20)", (shift_id,))
+    rollup = "select type, source, total, txn_count from daily_rollups where shift_id = %s"
+    assert pg.execute(rollup, (shift_id,)).fetchall() == [("sale", "", 520, 2)]
+    assert pg.execute("select * from rebuild_rollups(%s)", ([shift_id],)).fetchall() == [(shift_id,)]
+    assert pg.execute(rollup, (shift_id,)).fetchall() == [("sale", "", 520, 2)]
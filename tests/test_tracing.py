@@ -0,0 +1,22 @@
+import json
+
+import tracing
+from tracing import QueryTracer, TracedClient
+
+
+def test_payload_size_is_measured_only_when_asked(client, monkeypatch):
+    dumps, real_dumps = [], json.dumps
+    monkeypatch.setattr(tracing.json, "dumps", lambda *args, **kwargs: dumps.append(args) or real_dumps(*args, **kwargs))
+    tracer = QueryTracer()
+    traced = TracedClient(client, tracer)
+    client.table("settings").insert({"key": "shop_name", "value": "Shop"}).execute()
+
+    plain = tracer.start_run("Dashboard")
+    traced.table("settings").select("key, value").execute()
+    assert plain.queries[0]["rows"] == 1 and plain.queries[0]["bytes"] == 0
+    assert not dumps
+
+    measured = tracer.start_run("Dashboard", measure_bytes=True)
+    traced.table("settings").select("key, value").execute()
+    assert measured.queries[0]["bytes"] == len('[{"key": "shop_name", "value": "Shop"}]')
+    assert len(dumps) == 1
@@ -0,0 +1,103 @@
+import time
+
+import httpx
+import pytest
+
+import transport
+from transport import CircuitBreaker, Offline, ResilientTransport
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(transport, "backoff", lambda attempt: 0)
+
+
+def _client(replies, breaker, retries=2):
+    """httpx client whose requests get the replies in turn (a status code, or an exception to raise)."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        reply = replies[min(len(calls), len(replies)) - 1]
+        if isinstance(reply, Exception):
+            raise reply
+        return httpx.Response(reply)
+
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(handler), breaker=breaker, retries=retries),
+                          base_url="https://db.example")
+    return client, calls
+
+
+def test_retries_then_succeeds():
+    breaker = CircuitBreaker(failures=5)
+    client, calls = _client([503, httpx.ReadTimeout("slow"), 200], breaker)
+    assert client.get("/rest/v1/shifts").status_code == 200
+    assert calls == ["GET"] * 3
+    assert not breaker.is_open
+    # The success reset the count: it takes five more failures in a row to open
+    client, _ = _client([httpx.ConnectError("down")], breaker, retries=0)
+    for _ in range(4):
+        with pytest.raises(httpx.ConnectError):
+            client.get("/rest/v1/shifts")
+    assert not breaker.is_open
+
+
+def test_gives_up_after_the_retries():
+    client, calls = _client([503], CircuitBreaker(failures=10), retries=2)
+    assert client.get("/rest/v1/shifts").status_code == 503
+    assert len(calls) == 3
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3)
+    client, calls = _client([httpx.ConnectError("down")], breaker, retries=0)
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            client.get("/rest/v1/shifts")
+    assert breaker.is_open
+    with pytest.raises(Offline):
+        client.get("/rest/v1/shifts")
+    assert len(calls) == 3  # the open breaker did not send the request
+
+
+def test_half_open_probe_after_reset_window():
+    breaker = CircuitBreaker(failures=2, reset_after=0.05)
+    client, calls = _client([httpx.ConnectError("down")] * 2 + [503, 200], breaker, retries=0)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            client.get("/rest/v1/shifts")
+    with pytest.raises(Offline):
+        client.get("/rest/v1/shifts")
+
+    time.sleep(0.06)
+    # One request goes through as the probe; a failed probe re-opens the breaker at once
+    assert client.get("/rest/v1/shifts").status_code == 503
+    assert breaker.is_open
+    with pytest.raises(Offline):
+        client.get("/rest/v1/shifts")
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.failed()
+    time.sleep(0.06)
+    assert client.get("/rest/v1/shifts").status_code == 200
+    assert not breaker.is_open
+    assert len(calls) == 4
+
+
+def test_post_is_not_retried_once_it_may_have_been_sent():
+    client, calls = _client([503, 201], CircuitBreaker(failures=10))
+    assert client.post("/rest/v1/transactions", json={"amount": 1}).status_code == 503
+    assert calls == ["POST"]
+
+    client, calls = _client([httpx.ReadTimeout("slow"), 201], CircuitBreaker(failures=10))
+    with pytest.raises(httpx.ReadTimeout):
+        client.post("/rest/v1/transactions", json={"amount": 1})
+    assert calls == ["POST"]
+
+
+def test_post_is_retried_when_it_was_never_sent():
+    client, calls = _client([httpx.ConnectError("down"), 201], CircuitBreaker(failures=10))
+    assert client.post("/rest/v1/transactions", json={"amount": 1}).status_code == 201
+    assert calls == ["POST", "POST"]
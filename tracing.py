@@ -0,0 +1,148 @@
+"""Query tracing around the Supabase client.
+
+TracedClient wraps the client returned by init_supabase(). Every executed
+query is recorded with its table, filters, row count, response payload size
+and latency into the run (one Streamlit rerun) that is current on the
+calling thread; worker threads adopt the run of the page that started them
+(see concurrency.py). Runs are plain objects the app keeps per session, so the
+debug panel can show query counts and time per page and flag identical
+queries repeated within one rerun. Measuring a payload means serialising
+it again, so only runs started with measure_bytes (those of sessions that
+see the panel) do it; the others record 0 bytes.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+
+def _describe(name, args, kwargs):
+    parts = [repr(a) if not isinstance(a, str) else a for a in args]
+    parts += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{name}({', '.join(parts)})"
+
+
+class TraceRun:
+    def __init__(self, page=None, measure_bytes=False):
+        self.id = uuid.uuid4().hex[:8]
+        self.page = page
+        self.measure_bytes = measure_bytes
+        self.started = time.time()
+        self.queries = []
+
+    def record(self, entry):
+        self.queries.append(entry)
+
+    def duplicates(self):
+        counts = Counter(q["signature"] for q in self.queries)
+        return {sig: n for sig, n in counts.items() if n > 1}
+
+    def summary(self):
+        return {
+            "run": self.id,
+            "page": self.page,
+            "started": self.started,
+            "queries": len(self.queries),
+            "total_ms": round(sum(q["ms"] for q in self.queries), 1),
+            "rows": sum(q["rows"] for q in self.queries),
+            "bytes": sum(q["bytes"] for q in self.queries),
+            "duplicates": sum(n - 1 for n in self.duplicates().values()),
+        }
+
+    def to_dict(self):
+        return {**self.summary(), "log": self.queries}
+
+
+class QueryTracer:
+    def __init__(self):
+        self._local = threading.local()
+
+    def start_run(self, page=None, measure_bytes=False):
+        run = TraceRun(page, measure_bytes)
+        self._local.run = run
+        return run
+
+    def current_run(self):
+        return getattr(self._local, "run", None)
+
+    @contextmanager
+    def using(self, run):
+        """Record this thread's queries into run, e.g. in a worker started for a page."""
+        previous = self.current_run()
+        self._local.run = run
+        try:
+            yield run
+        finally:
+            self._local.run = previous
+
+    def record(self, entry):
+        run = self.current_run()
+        if run is not None:
+            run.record(entry)
+
+    def measuring_bytes(self):
+        run = self.current_run()
+        return run is not None and run.measure_bytes
+
+
+class _TracedQuery:
+    def __init__(self, builder, tracer, table, calls):
+        self._builder = builder
+        self._tracer = tracer
+        self._table = table
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _TracedQuery(result, self._tracer, self._table, self._calls + [_describe(name, args, kwargs)])
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self._builder.execute()
+            return response
+        except Exception as e:
+            error = e
+            response = None
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            data = getattr(response, "data", None)
+            self._tracer.record({
+                "table": self._table,
+                "filters": self._calls,
+                "signature": f"{self._table}." + ".".join(self._calls),
+                "rows": len(data) if isinstance(data, list) else int(data is not None),
+                "bytes": len(json.dumps(data, default=str)) if data is not None and self._tracer.measuring_bytes() else 0,
+                "ms": round(ms, 2),
+                "error": str(error) if error else None,
+            })
+
+
+class TracedClient:
+    """Supabase client proxy that records every executed table() / rpc() query."""
+
+    def __init__(self, client, tracer):
+        self._client = client
+        self.tracer = tracer
+
+    def table(self, name):
+        return _TracedQuery(self._client.table(name), self.tracer, name, [])
+
+    def rpc(self, fn, params=None, *args, **kwargs):
+        return _TracedQuery(self._client.rpc(fn, params or {}, *args, **kwargs), self.tracer, f"rpc:{fn}", [_describe("rpc", (fn,), params or {})])
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+tracer = QueryTracer()
@@ -0,0 +1,120 @@
+"""Columnar in-memory store of transaction rows.
+
+Rows arrive as dicts (or models.Transaction records) that repeat every key
+and hold ``type`` and ``source`` as strings. TransactionStore keeps them as
+NumPy columns instead: float64 amounts, int64 shift, vendor and expense
+head ids (-1 when missing) and int8 codes for type and source (their index
+in TYPES / SOURCES, -1 for None or unknown), 34 bytes a row. Any other
+column to group by (e.g. a "date" key) is kept as int64 codes into the
+column's distinct values, in the order they arrive. Columns grow by
+doubling, so append() is amortised O(1), and totals are boolean-masked sums
+over whole columns (see aggregation.cash_measures).
+"""
+import numpy as np
+
+TYPES = ["sale", "return", "expense", "vendor_payment", "purchase", "withdrawal"]
+SOURCES = ["sales", "jaib", "credit"]
+ID_COLUMNS = ["shift_id", "vendor_id", "expense_head_id"]
+MISSING = -1
+
+_TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+_SOURCE_CODES = {name: code for code, name in enumerate(SOURCES)}
+
+
+def _field(row, name):
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+def _empty(name, size):
+    if name == "amount":
+        return np.zeros(size, np.float64)
+    return np.full(size, MISSING, np.int8 if name in ("type", "source") else np.int64)
+
+
+def _convert(name, values):
+    if name == "amount":
+        return [float(a) if a is not None else 0.0 for a in values]
+    if name == "type":
+        return [_TYPE_CODES.get(t, MISSING) for t in values]
+    if name == "source":
+        return [_SOURCE_CODES.get(s, MISSING) for s in values]
+    return [i if i is not None else MISSING for i in values]
+
+
+class TransactionStore:
+    COLUMNS = ["amount", "type", "source", *ID_COLUMNS]
+
+    def __init__(self, capacity=64, keys=()):
+        """An empty store; keys are the extra columns (beyond COLUMNS) kept for grouping."""
+        self._size = 0
+        self._keys = {name: {} for name in keys if name not in self.COLUMNS}  # column -> {value: code}
+        self._columns = {name: _empty(name, capacity) for name in [*self.COLUMNS, *self._keys]}
+
+    @classmethod
+    def from_rows(cls, rows, keys=()):
+        store = cls(max(len(rows), 1), keys)
+        store.append(rows)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        """The stored values of a column (a view; do not modify)."""
+        return self._columns[name][:self._size]
+
+    def append(self, rows):
+        """Add transaction rows; a column a row does not have gets its missing value."""
+        if not rows:
+            return
+        needed = self._size + len(rows)
+        capacity = len(self._columns["amount"])
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name, values in self._columns.items():
+                self._columns[name] = np.concatenate([values[:self._size], _empty(name, capacity - self._size)])
+        for name in self._columns:
+            values = [_field(r, name) for r in rows]
+            if name in self._keys:
+                codes = self._keys[name]
+                values = [MISSING if v is None else codes.setdefault(v, len(codes)) for v in values]
+            else:
+                values = _convert(name, values)
+            self._columns[name][self._size:needed] = values
+        self._size = needed
+
+    def is_type(self, *types):
+        return np.isin(self.column("type"), [_TYPE_CODES[t] for t in types])
+
+    def is_source(self, *sources):
+        return np.isin(self.column("source"), [_SOURCE_CODES[s] for s in sources])
+
+    def total(self, mask=None):
+        amounts = self.column("amount")
+        return float(amounts.sum() if mask is None else amounts[mask].sum())
+
+    def totals_by(self, key, masks):
+        """Per-group sums of the amounts under each mask.
+
+        masks is {name: boolean mask}; returns (group keys as in groups(),
+        {name: [sum per group]}).
+        """
+        keys, groups = self.groups(key)
+        amounts = self.column("amount")
+        sums = {name: np.bincount(groups, weights=np.where(mask, amounts, 0.0), minlength=len(keys)).tolist()
+                for name, mask in masks.items()}
+        return keys, sums
+
+    def groups(self, key):
+        """(distinct values, each row's index into them) of an id or key column, None where missing.
+
+        With a list of columns the values are tuples, as in a pandas groupby.
+        """
+        names = [key] if isinstance(key, str) else list(key)
+        values, groups = np.unique(np.column_stack([self.column(k) for k in names]), axis=0, return_inverse=True)
+        # Key columns hold codes, in the order their values were first seen
+        lookups = [list(self._keys[name]) if name in self._keys else None for name in names]
+        decoded = [tuple(None if code == MISSING else lookup[code] if lookup else code for lookup, code in zip(lookups, row))
+                   for row in values.tolist()]
+        return [row[0] for row in decoded] if isinstance(key, str) else decoded, groups.reshape(-1)
@@ -0,0 +1,138 @@
+"""HTTP transport under the Supabase client: pooling, timeouts, retries and a circuit breaker.
+
+init_supabase() gives supabase-py the httpx client built by http_client().
+Its keep-alive connections (up to POOL_SIZE) are shared by every session and
+read-pool thread of the server process, and a request gives up after
+CONNECT_TIMEOUT seconds without a connection or READ_TIMEOUT without a reply
+instead of httpx's defaults.
+
+A failed attempt is retried up to RETRIES times after a jittered exponential
+backoff. Requests that may already have reached the server are only retried
+when repeating them is harmless (GET/HEAD); other requests only when no
+connection was made.
+
+The circuit breaker counts failed attempts in a row. After BREAKER_FAILURES
+it opens: requests fail at once with Offline, so the pages fall back to the
+offline journal, the session's ledgers, the last loaded settings, vendors
+and expense heads (cache.py) and the read replica without waiting on the
+network. BREAKER_RESET seconds later the next request goes through as
+a probe; it closes the breaker if it succeeds and re-opens it otherwise.
+Every setting can be overridden by an environment variable of the same name
+prefixed with SUPABASE_ (e.g. SUPABASE_READ_TIMEOUT=30).
+"""
+import os
+import random
+import threading
+import time
+
+import httpx
+
+
+def _setting(name, default):
+    return type(default)(os.environ.get(f"SUPABASE_{name}", default))
+
+
+CONNECT_TIMEOUT = _setting("CONNECT_TIMEOUT", 3.0)
+READ_TIMEOUT = _setting("READ_TIMEOUT", 15.0)
+POOL_SIZE = _setting("POOL_SIZE", 20)
+KEEPALIVE = _setting("KEEPALIVE", 60.0)  # seconds an idle connection is kept open
+RETRIES = _setting("RETRIES", 2)
+BACKOFF = _setting("BACKOFF", 0.25)  # upper bound of the first retry's delay, doubled per retry
+BACKOFF_MAX = _setting("BACKOFF_MAX", 2.0)
+BREAKER_FAILURES = _setting("BREAKER_FAILURES", 3)
+BREAKER_RESET = _setting("BREAKER_RESET", 15.0)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {502, 503, 504}
+# Failures in which the request cannot have reached the server
+NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class Offline(httpx.TransportError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """True if a request may be sent: the breaker is closed, or this request is the probe."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_after:
+                return False
+            self._probing = True
+            return True
+
+    def succeeded(self):
+        with self._lock:
+            self._failed, self._opened_at, self._probing = 0, None, False
+
+    def failed(self):
+        with self._lock:
+            self._failed += 1
+            if self._probing or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+breaker = CircuitBreaker()
+
+
+def backoff(attempt):
+    """Delay before retry number attempt + 1: uniform up to BACKOFF * 2**attempt ("full jitter")."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF * 2 ** attempt))
+
+
+class ResilientTransport(httpx.BaseTransport):
+    def __init__(self, transport=None, breaker=breaker, retries=RETRIES):
+        self._transport = transport or httpx.HTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE, keepalive_expiry=KEEPALIVE),
+        )
+        self.breaker = breaker
+        self.retries = retries
+
+    def handle_request(self, request):
+        safe = request.method in SAFE_METHODS
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise Offline(f"Supabase unreachable, next attempt within {self.breaker.reset_after:g}s", request=request)
+            try:
+                response = self._transport.handle_request(request)
+            except Exception as e:
+                self.breaker.failed()
+                if attempt == self.retries or not (safe or isinstance(e, NOT_SENT)):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.succeeded()
+                    return response
+                self.breaker.failed()
+                if attempt == self.retries or not safe:
+                    return response
+                response.close()
+            time.sleep(backoff(attempt))
+
+    def close(self):
+        self._transport.close()
+
+
+def http_client():
+    """httpx client for supabase-py's ClientOptions(httpx_client=...)."""
+    return httpx.Client(
+        transport=ResilientTransport(),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
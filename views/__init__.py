@@ -0,0 +1,19 @@
+"""Pages of the app, run through st.navigation by app.py.
+
+Each page is a script that imports what it needs from services.py, so a
+rerun only executes (and only imports the libraries of) the page on show.
+"""
+PAGES = {
+    "Dashboard": "views/dashboard.py",
+    "Recording": "views/recording.py",
+    "Reports": "views/reporting.py",
+    "Vendor Manage": "views/vendors.py",
+    "Expense Head Manage": "views/expense_heads.py",
+    "Settings": "views/settings.py",
+}
+SUPER_USER_PAGES = {"Settings"}
+
+
+def pages_for(role):
+    """Titles of the pages a role can open, in navigation order."""
+    return [title for title in PAGES if role == "super_user" or title not in SUPER_USER_PAGES]
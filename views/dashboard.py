@@ -0,0 +1,45 @@
+# ---------- DASHBOARD ----------
+from datetime import date
+
+import streamlit as st
+
+from aggregation import cash_measures
+from concurrency import gather
+from rollups import period_rows
+from services import supabase
+
+st.header("📊 Dashboard")
+col1, col2 = st.columns([2,1])
+with col1:
+    selected_date = st.date_input("Select Date", value=date.today())
+
+def day_rows():
+    shifts_resp = supabase.table("shifts").select("id, status").eq("date", selected_date.isoformat()).execute()
+    return period_rows(supabase, shifts_resp.data)
+
+def last_closed_cash():
+    last_closed = supabase.table("shifts").select("actual_closing").eq("status", "closed").order("created_at", desc=True).limit(1).execute()
+    return last_closed.data[0]["actual_closing"] if last_closed.data else 0.0
+
+# The day's figures and the cash in hand do not depend on each other
+txns, current_cash = gather(day_rows, last_closed_cash, return_exceptions=True)
+if isinstance(txns, Exception):
+    st.warning(f"Could not load the day's figures: {txns}")
+    txns = []
+if isinstance(current_cash, Exception):
+    st.warning(f"Could not load the cash in hand: {current_cash}")
+    current_cash = 0.0
+m = cash_measures(txns)
+sales, returns, withdrawals = m["sales"], m["returns"], m["withdrawals"]
+expenses, vendor_payments, purchases = m["expenses"], m["vendor_payments"], m["purchases"]
+net_cash = sales - returns - expenses - vendor_payments - purchases - withdrawals
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Total Sales", f"₹{sales:.2f}")
+col2.metric("Returns", f"₹{returns:.2f}")
+col3.metric("Expenses (cash)", f"₹{expenses:.2f}")
+col4.metric("Vendor Payments", f"₹{vendor_payments:.2f}")
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Purchases (cash)", f"₹{purchases:.2f}")
+col2.metric("Withdrawals", f"₹{withdrawals:.2f}")
+col3.metric("Net Cash Flow", f"₹{net_cash:.2f}")
+col4.metric("Current Cash in Hand", f"₹{current_cash:.2f}")
@@ -0,0 +1,45 @@
+# ---------- EXPENSE HEAD MANAGE ----------
+import streamlit as st
+
+from services import add_pending_op, invalidate_reference_data, supabase
+
+st.header("📋 Manage Expense Heads")
+show_inactive = st.checkbox("Show inactive heads", key="exp_show_inactive")
+try:
+    query = supabase.table("expense_heads").select("id, name, is_active")
+    if not show_inactive:
+        query = query.eq("is_active", True)
+    heads = query.execute().data
+    for h in heads:
+        col1, col2, col3, col4, col5 = st.columns([3,1,1,1,1])
+        col1.write(h["name"])
+        col2.write("Active" if h["is_active"] else "Inactive")
+        if col3.button("Edit", key=f"edit_head_{h['id']}"):
+            st.session_state[f"edit_head_{h['id']}"] = True
+        if col4.button("Toggle Active", key=f"toggle_head_{h['id']}"):
+            new_status = not h["is_active"]
+            try:
+                supabase.table("expense_heads").update({"is_active": new_status}).eq("id", h["id"]).execute()
+                invalidate_reference_data()
+                st.rerun()
+            except:
+                add_pending_op("expense_heads", {"id": h["id"], "is_active": new_status}, "update")
+        if col5.button("Delete", key=f"del_head_{h['id']}"):
+            try:
+                supabase.table("expense_heads").delete().eq("id", h["id"]).execute()
+                invalidate_reference_data()
+                st.rerun()
+            except:
+                add_pending_op("expense_heads", {"id": h["id"]}, "delete")
+    with st.form("new_head"):
+        new_name = st.text_input("Expense Head Name")
+        if st.form_submit_button("Add Head"):
+            if new_name:
+                try:
+                    supabase.table("expense_heads").insert({"name": new_name, "is_active": True}).execute()
+                    invalidate_reference_data()
+                    st.rerun()
+                except:
+                    add_pending_op("expense_heads", {"name": new_name, "is_active": True})
+except Exception as e:
+    st.error(f"Could not load expense heads: {e}")
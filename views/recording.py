@@ -0,0 +1,210 @@
+# ---------- RECORDING ----------
+from datetime import date
+
+import streamlit as st
+
+from concurrency import gather
+from services import (SHIFT_NAMES, close_shift, fragment_rerun, get_active_expense_heads, get_active_vendors, insert_rows,
+                      journal, load_recording_day, multi_row_entry, start_trace_run, supabase)
+
+CLOSED_ELSEWHERE = "The {} shift was closed on another device; entries now go to its next session."
+
+st.header("📝 Shift Recording")
+rec_date = st.date_input("Select Date", value=date.today())
+# Shifts already on screen keep their running figures instead of being re-read
+known = st.session_state.get("rec_day")
+# Warm the vendor and expense head lists the tabs' forms use while the day loads
+day_ledgers, _, _ = gather(lambda: load_recording_day(rec_date, known), get_active_expense_heads, get_active_vendors, return_exceptions=True)
+if isinstance(day_ledgers, Exception):
+    st.error(f"Error accessing shift: {day_ledgers}")
+    # The date's shifts already loaded stay on screen with their running figures
+    day_ledgers = {name: ledger for name, ledger in (known or {}).items() if ledger.shift["date"] == rec_date.isoformat() and ledger.is_open}
+for name, ledger in (known or {}).items():
+    if ledger.shift["date"] == rec_date.isoformat() and not ledger.is_open:
+        st.session_state[f"rec_notice_{name}"] = ("warning", CLOSED_ELSEWHERE.format(name))
+# The shift tabs rerun on their own (st.fragment) and draw from these ledgers,
+# so adding a form row or switching a selectbox makes no queries
+st.session_state.rec_day = day_ledgers
+
+def record(shift_name, rows, notice=None):
+    """Add rows just sent or queued to the shift's running figures and rerun only its tab.
+
+    notice, e.g. ("success", "Sale added!"), is shown once after the rerun.
+    """
+    st.session_state.rec_day[shift_name].apply(rows)
+    if notice:
+        st.session_state[f"rec_notice_{shift_name}"] = notice
+    st.rerun(scope="fragment" if fragment_rerun() else "app")
+
+@st.fragment
+def shift_panel(shift_name):
+    if fragment_rerun():
+        # app.py, which starts the trace run of a full rerun, is skipped
+        start_trace_run(f"Recording: {shift_name}")
+    if shift_name not in st.session_state.rec_day:
+        st.error("Could not load shift. Check connection.")
+        return
+    ledger = st.session_state.rec_day[shift_name]
+    ledger.poll(supabase, journal)
+    if not ledger.is_open:
+        # Closed on another device: the full rerun loads the shift's next session
+        st.session_state.rec_day.pop(shift_name)
+        st.session_state[f"rec_notice_{shift_name}"] = ("warning", CLOSED_ELSEWHERE.format(shift_name))
+        st.rerun()
+    shift = ledger.shift
+    st.subheader(f"{shift_name} Shift - {rec_date}")
+    st.write(f"Opening Cash: ₹{shift['opening_cash']:.2f}")
+    col1, col2 = st.columns([6, 1])
+    col1.info(f"Expected Closing Cash: ₹{ledger.expected:.2f}")
+    if col2.button("🔄", key=f"reconcile_{shift_name}", help="Re-read this shift's totals, including other cashiers' entries"):
+        try:
+            ledger.reconcile(supabase, journal)
+        except Exception as e:
+            st.session_state[f"rec_notice_{shift_name}"] = ("error", f"Could not refresh: {e}")
+        st.rerun(scope="fragment" if fragment_rerun() else "app")
+    notice = st.session_state.pop(f"rec_notice_{shift_name}", None)
+    if notice:
+        getattr(st, notice[0])(notice[1])
+    with st.expander("➕ Add Sale"):
+        with st.form(f"sale_{shift_name}"):
+            amt = st.number_input("Amount", min_value=0.0, format="%.2f", key=f"sale_amt_{shift_name}")
+            desc = st.text_area("Description", key=f"sale_desc_{shift_name}")
+            if st.form_submit_button("Add Sale"):
+                data = {"shift_id": shift["id"], "type": "sale", "amount": amt, "description": desc}
+                if insert_rows("transactions", [data], rec_date):
+                    record(shift_name, [data], ("success", "Sale added!"))
+                else:
+                    record(shift_name, [data], ("warning", "Offline: sale will be saved when connection resumes."))
+    with st.expander("➕ Add Sales (Multiple)"):
+        multi_row_entry("msale", shift_name, rec_date, [
+            ("amt", 2, lambda key: st.number_input("Amount", min_value=0.0, format="%.2f", key=key)),
+            ("desc", 5, lambda key: st.text_input("Description", key=key)),
+        ], lambda v: {
+            "shift_id": shift["id"],
+            "type": "sale",
+            "amount": v["amt"],
+            "description": v["desc"] or ""
+        } if v["amt"] else None, "sale", "Sales", lambda batch: record(shift_name, batch))
+    with st.expander("💰 Add Expense (Multiple)"):
+        expense_heads = get_active_expense_heads()
+        head_options = {h["id"]: h["name"] for h in expense_heads}
+        multi_row_entry("exp", shift_name, rec_date, [
+            ("head", 3, lambda key: st.selectbox("Head", options=list(head_options.keys()), format_func=lambda x: head_options[x], key=key)),
+            ("amt", 2, lambda key: st.number_input("Amount", min_value=0.0, format="%.2f", key=key)),
+            ("src", 2, lambda key: st.selectbox("Source", ["sales", "jaib"], key=key)),
+            ("desc", 3, lambda key: st.text_input("Description", key=key)),
+        ], lambda v: {
+            "shift_id": shift["id"],
+            "type": "expense",
+            "expense_head_id": v["head"],
+            "amount": v["amt"],
+            "source": v["src"],
+            "description": v["desc"] or ""
+        } if v["head"] and v["amt"] and v["src"] else None, "expense", "Expenses", lambda batch: record(shift_name, batch))
+    with st.expander("💵 Vendor Payment"):
+        with st.form(f"vendor_payment_{shift_name}"):
+            vendors = get_active_vendors()
+            vendor_options = {v["id"]: v["name"] for v in vendors}
+            vendor_id = st.selectbox("Vendor", options=list(vendor_options.keys()), format_func=lambda x: vendor_options[x], key=f"vp_vendor_{shift_name}")
+            amt = st.number_input("Amount", min_value=0.0, format="%.2f", key=f"vp_amt_{shift_name}")
+            source = st.selectbox("Source", ["sales", "jaib"], key=f"vp_src_{shift_name}")
+            method = st.text_input("Payment Method (optional)", key=f"vp_method_{shift_name}")
+            desc = st.text_area("Description (optional)", key=f"vp_desc_{shift_name}")
+            if st.form_submit_button("Add Payment"):
+                data = {
+                    "shift_id": shift["id"],
+                    "type": "vendor_payment",
+                    "vendor_id": vendor_id,
+                    "amount": amt,
+                    "source": source,
+                    "payment_method": method,
+                    "description": desc
+                }
+                if insert_rows("transactions", [data], rec_date):
+                    record(shift_name, [data], ("success", "Payment added!"))
+                else:
+                    record(shift_name, [data], ("warning", "Offline: payment will be saved later."))
+    with st.expander("🛒 Purchase"):
+        with st.form(f"purchase_{shift_name}"):
+            vendors = get_active_vendors()
+            vendor_options = {v["id"]: v["name"] for v in vendors}
+            vendor_id = st.selectbox("Vendor", options=list(vendor_options.keys()), format_func=lambda x: vendor_options[x], key=f"pur_vendor_{shift_name}")
+            amt = st.number_input("Amount", min_value=0.0, format="%.2f", key=f"pur_amt_{shift_name}")
+            source = st.selectbox("Source", ["sales", "jaib", "credit"], key=f"pur_src_{shift_name}")
+            desc = st.text_area("Description (optional)", key=f"pur_desc_{shift_name}")
+            if st.form_submit_button("Add Purchase"):
+                data = {
+                    "shift_id": shift["id"],
+                    "type": "purchase",
+                    "vendor_id": vendor_id,
+                    "amount": amt,
+                    "source": source,
+                    "description": desc
+                }
+                if insert_rows("transactions", [data], rec_date):
+                    record(shift_name, [data], ("success", "Purchase added!"))
+                else:
+                    record(shift_name, [data], ("warning", "Offline: purchase will be saved later."))
+    with st.expander("🛒 Purchases (Multiple)"):
+        vendors = get_active_vendors()
+        vendor_options = {v["id"]: v["name"] for v in vendors}
+        multi_row_entry("mpur", shift_name, rec_date, [
+            ("vendor", 3, lambda key: st.selectbox("Vendor", options=list(vendor_options.keys()), format_func=lambda x: vendor_options[x], key=key)),
+            ("amt", 2, lambda key: st.number_input("Amount", min_value=0.0, format="%.2f", key=key)),
+            ("src", 2, lambda key: st.selectbox("Source", ["sales", "jaib", "credit"], key=key)),
+            ("desc", 3, lambda key: st.text_input("Description", key=key)),
+        ], lambda v: {
+            "shift_id": shift["id"],
+            "type": "purchase",
+            "vendor_id": v["vendor"],
+            "amount": v["amt"],
+            "source": v["src"],
+            "description": v["desc"] or ""
+        } if v["vendor"] and v["amt"] and v["src"] else None, "purchase", "Purchases", lambda batch: record(shift_name, batch))
+    with st.expander("🏧 Withdrawal"):
+        with st.form(f"withdrawal_{shift_name}"):
+            amt = st.number_input("Amount", min_value=0.0, format="%.2f", key=f"with_amt_{shift_name}")
+            reason = st.text_area("Reason", key=f"with_reason_{shift_name}")
+            if st.form_submit_button("Add Withdrawal"):
+                data = {
+                    "shift_id": shift["id"],
+                    "type": "withdrawal",
+                    "amount": amt,
+                    "description": reason
+                }
+                if insert_rows("transactions", [data], rec_date):
+                    record(shift_name, [data], ("success", "Withdrawal added!"))
+                else:
+                    record(shift_name, [data], ("warning", "Offline: withdrawal will be saved later."))
+    with st.expander("🔄 Return"):
+        with st.form(f"return_{shift_name}"):
+            amt = st.number_input("Amount", min_value=0.0, format="%.2f", key=f"ret_amt_{shift_name}")
+            reason = st.text_area("Reason", key=f"ret_reason_{shift_name}")
+            if st.form_submit_button("Add Return"):
+                data = {
+                    "shift_id": shift["id"],
+                    "type": "return",
+                    "amount": amt,
+                    "description": reason
+                }
+                if insert_rows("transactions", [data], rec_date):
+                    record(shift_name, [data], ("success", "Return added!"))
+                else:
+                    record(shift_name, [data], ("warning", "Offline: return will be saved later."))
+    if shift["status"] == "open":
+        st.divider()
+        st.subheader("Close Shift")
+        actual = st.number_input("Actual Cash in Hand", min_value=0.0, format="%.2f", key=f"actual_{shift_name}")
+        if st.button(f"Close {shift_name} Shift", key=f"close_{shift_name}"):
+            if close_shift(shift["id"], actual):
+                st.success("Shift closed!")
+                # Closing opens the shift's next session, which the rerun loads in place of this one
+                st.session_state.rec_day.pop(shift_name, None)
+                st.rerun()
+            else:
+                st.error("Failed to close shift.")
+
+shift_tab = st.tabs(SHIFT_NAMES)
+for idx, shift_name in enumerate(SHIFT_NAMES):
+    with shift_tab[idx]:
+        shift_panel(shift_name)
@@ -0,0 +1,189 @@
+# ---------- REPORTS ----------
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import exporting
+import reports
+from aggregation import cash_measures
+from queries import stream_rows
+from rollups import period_rows
+from services import build_report, get_shop_details, report_cache, report_client, report_range_closed, synced_through
+
+def read_table(csv_file):
+    """A report's table, read back from its CSV file as the report's strings."""
+    df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    csv_file.seek(0)
+    return df
+
+st.header("📈 Reports")
+# The local read replica once it is filled (see replica.py), the backend before that
+db = report_client()
+rep_tab = st.tabs(["Shift Report", "Expense Report", "Vendor Report", "Personal Ledger", "Profit & Loss"])
+# Shift Report
+with rep_tab[0]:
+    st.subheader("Shift Report")
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start Date", value=date.today() - timedelta(days=7), key="shift_start")
+    with col2:
+        end_date = st.date_input("End Date", value=date.today(), key="shift_end")
+    shift_filter = st.selectbox("Select Shift", ["All", "Morning", "Evening", "Night"], key="shift_filter")
+    if st.button("Generate Shift Report", key="gen_shift"):
+        try:
+            columns = reports.SHIFT_REPORT_COLUMNS
+            title = f"Shift Report ({shift_filter})"
+            csv_file, pdf_file = build_report("shift", start_date, end_date, shift_filter,
+                lambda: reports.shift_report(db, start_date, end_date, shift_filter), columns, title)
+            if csv_file is None:
+                st.warning("No shifts found.")
+            else:
+                df = read_table(csv_file)
+                st.dataframe(df)
+                st.download_button("Download CSV", data=exporting.reader(csv_file), file_name="shift_report.csv", mime="text/csv")
+                st.download_button("Download PDF", data=exporting.reader(pdf_file), file_name="shift_report.pdf", mime="application/pdf")
+        except Exception as e:
+            st.error(f"Error: {e}")
+# Expense Report
+with rep_tab[1]:
+    st.subheader("Expense Report")
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start Date", value=date.today() - timedelta(days=7), key="exp_start")
+    with col2:
+        end_date = st.date_input("End Date", value=date.today(), key="exp_end")
+    try:
+        heads = db.table("expense_heads").select("id, name").execute().data
+        head_options = {0: "All Heads"}
+        head_options.update({h["id"]: h["name"] for h in heads})
+        selected_head = st.selectbox("Select Expense Head", options=list(head_options.keys()), format_func=lambda x: head_options[x], key="exp_head")
+    except:
+        st.error("Could not load expense heads.")
+        selected_head = 0
+    if st.button("Generate Expense Report", key="gen_exp"):
+        try:
+            columns = reports.EXPENSE_REPORT_COLUMNS
+            head_name = head_options[selected_head] if selected_head != 0 else "All Heads"
+            title = f"Expense Report ({head_name})"
+            csv_file, pdf_file = build_report("expense", start_date, end_date, selected_head,
+                lambda: reports.expense_report(db, start_date, end_date, selected_head), columns, title)
+            if csv_file is None:
+                st.warning("No expenses found.")
+            else:
+                df = read_table(csv_file)
+                st.dataframe(df)
+                st.download_button("Download CSV", data=exporting.reader(csv_file), file_name="expense_report.csv", mime="text/csv")
+                st.download_button("Download PDF", data=exporting.reader(pdf_file), file_name="expense_report.pdf", mime="application/pdf")
+        except Exception as e:
+            st.error(f"Error: {e}")
+# Vendor Report
+with rep_tab[2]:
+    st.subheader("Vendor Report")
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start Date", value=date.today() - timedelta(days=7), key="ven_start")
+    with col2:
+        end_date = st.date_input("End Date", value=date.today(), key="ven_end")
+    try:
+        vendors = db.table("vendors").select("id, name").execute().data
+        vendor_options = {0: "All Vendors"}
+        vendor_options.update({v["id"]: v["name"] for v in vendors})
+        selected_vendor = st.selectbox("Select Vendor", options=list(vendor_options.keys()), format_func=lambda x: vendor_options[x], key="ven_vendor")
+    except:
+        st.error("Could not load vendors.")
+        selected_vendor = 0
+    if st.button("Generate Vendor Report", key="gen_ven"):
+        try:
+            columns = reports.VENDOR_REPORT_COLUMNS
+            vendor_name = vendor_options[selected_vendor] if selected_vendor != 0 else "All Vendors"
+            title = f"Vendor Report ({vendor_name})"
+            csv_file, pdf_file = build_report("vendor", start_date, end_date, selected_vendor,
+                lambda: reports.vendor_report(db, start_date, end_date, selected_vendor, synced_through(db)), columns, title)
+            if csv_file is None:
+                st.warning("No vendor transactions found.")
+            else:
+                df = read_table(csv_file)
+                st.dataframe(df)
+                st.download_button("Download CSV", data=exporting.reader(csv_file), file_name="vendor_report.csv", mime="text/csv")
+                st.download_button("Download PDF", data=exporting.reader(pdf_file), file_name="vendor_report.pdf", mime="application/pdf")
+        except Exception as e:
+            st.error(f"Error: {e}")
+# Personal Ledger
+with rep_tab[3]:
+    st.subheader("Personal Ledger")
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start Date", value=date.today() - timedelta(days=7), key="per_start")
+    with col2:
+        end_date = st.date_input("End Date", value=date.today(), key="per_end")
+    if st.button("Generate Personal Ledger", key="gen_per"):
+        try:
+            columns = reports.PERSONAL_LEDGER_COLUMNS
+            csv_file, pdf_file = build_report("ledger", start_date, end_date, "",
+                lambda: reports.personal_ledger(db, start_date, end_date, synced_through(db)), columns, "Personal Ledger")
+            if csv_file is None:
+                st.warning("No personal transactions found.")
+            else:
+                # Downloads first: they must not depend on the table rendering
+                st.download_button("Download CSV", data=exporting.reader(csv_file), file_name="personal_ledger.csv", mime="text/csv")
+                st.download_button("Download PDF", data=exporting.reader(pdf_file), file_name="personal_ledger.pdf", mime="application/pdf")
+                df = read_table(csv_file)
+                def color_balance(val):
+                    try:
+                        num = float(val)
+                        color = 'red' if num < 0 else 'green'
+                        return f'color: {color}'
+                    except:
+                        return ''
+                # pandas' Styler refuses tables over styler.render.max_elements cells; show those plain
+                if df.size <= pd.get_option("styler.render.max_elements"):
+                    st.dataframe(df.style.map(color_balance, subset=['Balance']))
+                else:
+                    st.dataframe(df)
+        except Exception as e:
+            st.error(f"Error: {e}")
+# Profit & Loss
+with rep_tab[4]:
+    st.subheader("Profit & Loss")
+    col1, col2 = st.columns(2)
+    with col1:
+        pl_start = st.date_input("Start Date", value=date.today() - timedelta(days=30), key="pl_start")
+    with col2:
+        pl_end = st.date_input("End Date", value=date.today(), key="pl_end")
+    cogs = st.number_input("COGS (Cost of Goods Sold)", min_value=0.0, format="%.2f", value=0.0)
+    if st.button("Calculate P&L", key="calc_pl"):
+        try:
+            pl_closed = report_range_closed(pl_start, pl_end)
+            cached = report_cache.get("pl", pl_start, pl_end, f"cogs={cogs:.2f}") if pl_closed else None
+            if cached:
+                net_sales, expenses = cached["rows"]
+                pdf_file = cached["pdf"]
+            else:
+                pl_shifts = list(stream_rows(lambda: db.table("shifts").select("id, status, created_at").gte("date", pl_start.isoformat()).lte("date", pl_end.isoformat())))
+                m = cash_measures(period_rows(db, pl_shifts))
+                net_sales = m["sales"] - m["returns"]
+                expenses = m["expenses"]
+                pdf_file = None
+            gross_profit = net_sales - cogs
+            net_profit = gross_profit - expenses
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Net Sales", f"₹{net_sales:.2f}")
+            col2.metric("COGS", f"₹{cogs:.2f}")
+            col3.metric("Gross Profit", f"₹{gross_profit:.2f}")
+            col1.metric("Expenses", f"₹{expenses:.2f}")
+            col2.metric("Net Profit", f"₹{net_profit:.2f}")
+            # PDF report
+            if pdf_file is None:
+                pdf_file = exporting.summary_pdf("Profit & Loss Statement", f"{pl_start} to {pl_end}", [
+                    f"Net Sales: ₹{net_sales:.2f}",
+                    f"COGS: ₹{cogs:.2f}",
+                    f"Gross Profit: ₹{gross_profit:.2f}",
+                    f"Expenses: ₹{expenses:.2f}",
+                    f"Net Profit: ₹{net_profit:.2f}",
+                ], get_shop_details())
+                if pl_closed:
+                    report_cache.put("pl", pl_start, pl_end, f"cogs={cogs:.2f}", [net_sales, expenses], pdf_file=pdf_file)
+            st.download_button("Download PDF", data=exporting.reader(pdf_file), file_name="profit_loss.pdf", mime="application/pdf")
+        except Exception as e:
+            st.error(f"Error: {e}")
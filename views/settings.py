@@ -0,0 +1,81 @@
+# ---------- SETTINGS (Super User only) ----------
+from datetime import date, timedelta
+
+import streamlit as st
+
+from cache import reference_cache
+from rollups import rebuild_rollups
+from services import get_settings, supabase, update_setting
+
+if st.session_state.role != "super_user":
+    st.error("Access denied. Super user only.")
+    st.stop()
+st.header("⚙️ Settings")
+tab1, tab2, tab3 = st.tabs(["User Management", "App Settings", "Styling"])
+with tab1:
+    st.subheader("Manage Users")
+    try:
+        users = supabase.table("users").select("id, username, role").execute().data
+        for u in users:
+            col1, col2, col3, col4 = st.columns([3,2,1,1])
+            col1.write(u["username"])
+            col2.write(u["role"])
+            if u["username"] != st.session_state.user["username"]:
+                if col4.button("🗑️", key=f"del_user_{u['id']}"):
+                    supabase.table("users").delete().eq("id", u["id"]).execute()
+                    st.rerun()
+            else:
+                col4.write("(you)")
+        with st.form("add_user"):
+            new_user = st.text_input("Username")
+            new_pass = st.text_input("Password", type="password")
+            new_role = st.selectbox("Role", ["owner", "super_user"])
+            if st.form_submit_button("Create User"):
+                if new_user and new_pass:
+                    existing = supabase.table("users").select("id").eq("username", new_user).execute()
+                    if existing.data:
+                        st.error("Username exists.")
+                    else:
+                        supabase.table("users").insert({"username": new_user, "password": new_pass, "role": new_role}).execute()
+                        st.success("User created!")
+                        st.rerun()
+    except Exception as e:
+        st.error(f"Could not load users: {e}")
+with tab2:
+    st.subheader("Application Settings")
+    settings = get_settings()
+    cache_stats = reference_cache.stats()
+    st.caption(f"Reference cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries (TTL {cache_stats['ttl']}s)")
+    with st.form("settings_form"):
+        shop_name = st.text_input("Shop Name", value=settings.get("shop_name", ""))
+        shop_address = st.text_area("Shop Address", value=settings.get("shop_address", ""))
+        logo_url = st.text_input("Logo URL", value=settings.get("logo_url", ""))
+        pdf_css = st.text_area("PDF Styling (CSS)", value=settings.get("pdf_css", ""), height=150)
+        if st.form_submit_button("Save Settings"):
+            update_setting("shop_name", shop_name)
+            update_setting("shop_address", shop_address)
+            update_setting("logo_url", logo_url)
+            update_setting("pdf_css", pdf_css)
+            st.success("Settings saved!")
+            st.rerun()
+    st.subheader("Daily Rollups")
+    col1, col2 = st.columns(2)
+    with col1:
+        rb_start = st.date_input("Start Date", value=date.today() - timedelta(days=30), key="rollup_start")
+    with col2:
+        rb_end = st.date_input("End Date", value=date.today(), key="rollup_end")
+    if st.button("Rebuild Rollups", key="rebuild_rollups"):
+        try:
+            rebuilt = rebuild_rollups(supabase, start_date=rb_start, end_date=rb_end)
+            st.success(f"Rebuilt rollups for {rebuilt} closed shift(s).")
+        except Exception as e:
+            st.error(f"Error: {e}")
+with tab3:
+    st.subheader("App Styling (Custom CSS)")
+    settings = get_settings()
+    with st.form("app_css_form"):
+        app_css = st.text_area("App CSS", value=settings.get("app_css", ""), height=200)
+        if st.form_submit_button("Update App CSS"):
+            update_setting("app_css", app_css)
+            st.success("App CSS updated!")
+            st.rerun()
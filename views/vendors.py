@@ -0,0 +1,48 @@
+# ---------- VENDOR MANAGE ----------
+import streamlit as st
+
+from services import add_pending_op, invalidate_reference_data, supabase
+
+st.header("🏢 Manage Vendors")
+show_inactive = st.checkbox("Show inactive vendors")
+try:
+    query = supabase.table("vendors").select("id, name, is_active")
+    if not show_inactive:
+        query = query.eq("is_active", True)
+    vendors = query.execute().data
+    for v in vendors:
+        col1, col2, col3, col4, col5 = st.columns([3,1,1,1,1])
+        col1.write(v["name"])
+        col2.write("Active" if v["is_active"] else "Inactive")
+        if col3.button("Edit", key=f"edit_{v['id']}"):
+            st.session_state[f"edit_vendor_{v['id']}"] = True
+        if col4.button("Toggle Active", key=f"toggle_{v['id']}"):
+            new_status = not v["is_active"]
+            try:
+                supabase.table("vendors").update({"is_active": new_status}).eq("id", v["id"]).execute()
+                invalidate_reference_data()
+                st.rerun()
+            except:
+                add_pending_op("vendors", {"id": v["id"], "is_active": new_status}, "update")
+                st.warning("Offline: update pending")
+        if col5.button("Delete", key=f"del_{v['id']}"):
+            try:
+                supabase.table("vendors").delete().eq("id", v["id"]).execute()
+                invalidate_reference_data()
+                st.rerun()
+            except:
+                add_pending_op("vendors", {"id": v["id"]}, "delete")
+                st.warning("Offline: delete pending")
+    with st.form("new_vendor"):
+        new_name = st.text_input("Vendor Name")
+        if st.form_submit_button("Add Vendor"):
+            if new_name:
+                try:
+                    supabase.table("vendors").insert({"name": new_name, "is_active": True}).execute()
+                    invalidate_reference_data()
+                    st.rerun()
+                except:
+                    add_pending_op("vendors", {"name": new_name, "is_active": True})
+                    st.warning("Offline: vendor will be added later")
+except Exception as e:
+    st.error(f"Could not load vendors: {e}")